@@ -11,3 +11,10 @@ class ProductsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.products"
+
+    def ready(self):
+        """
+        Register product signal handlers.
+        """
+        # pylint: disable=import-outside-toplevel,unused-import
+        from . import signals
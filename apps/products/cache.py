@@ -0,0 +1,160 @@
+"""
+Product catalog response cache.
+
+Rendered catalog responses are stored under a key that includes a catalog
+version counter. Every committed write to the catalog bumps the counter, so
+old entries are no longer read and simply age out of the backend.
+
+The counter lives in ``PRODUCT_CATALOG_CACHE["ALIAS"]``. With a per-process
+backend such as locmem, a write only bumps the version of the process that
+made it. Other workers notice it when their catalog validator expires, after
+at most ``VALIDATOR_TIMEOUT`` seconds: list pages are cached under the ETag
+built from the validator, so a new validator also means new pages. A shared
+cache makes writes visible to every worker at once.
+
+Cached pages and validators are always read from the primary database. A
+page filled from a lagging replica right after a write would otherwise be
+stored under the new version and served to everyone, the writer included.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Max
+
+from .models import Product
+
+VERSION_KEY = "catalog:version"
+
+
+def _config():
+    return getattr(settings, "PRODUCT_CATALOG_CACHE", {})
+
+
+def _validator_timeout():
+    return _config().get("VALIDATOR_TIMEOUT", 5)
+
+
+def get_catalog_cache():
+    """
+    Return the cache backend configured for the catalog.
+    """
+    return caches[_config().get("ALIAS", "default")]
+
+
+def catalog_version():
+    """
+    Return the current catalog version.
+    """
+    cache = get_catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+async def acatalog_version():
+    """
+    Async ``catalog_version``.
+    """
+    cache = get_catalog_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, 1, timeout=None)
+        version = await cache.aget(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog response once the transaction commits.
+
+    Bumping earlier would let a concurrent reader cache the rows it still
+    sees from before the commit under the new version.
+    """
+    transaction.on_commit(_incr_catalog_version)
+
+
+def _incr_catalog_version():
+    cache = get_catalog_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, timeout=None)
+
+
+def catalog_validator():
+    """
+    Return ``(row count, last updated_at)`` of the product table.
+
+    The aggregate is cached per catalog version for ``VALIDATOR_TIMEOUT``
+    seconds, so writes made by other processes show up after that delay even
+    when versions are per process.
+    """
+    version = catalog_version()
+    key = f"catalog:v{version}:validator"
+    validator = get_catalog_cache().get(key)
+    if validator is None:
+        stats = Product.objects.using(DEFAULT_DB_ALIAS).aggregate(
+            count=Count("id"), modified=Max("updated_at")
+        )
+        validator = (stats["count"], stats["modified"])
+        get_catalog_cache().set(key, validator, timeout=_validator_timeout())
+    return validator
+
+
+async def acatalog_validator():
+    """
+    Async ``catalog_validator``.
+    """
+    version = await acatalog_version()
+    key = f"catalog:v{version}:validator"
+    validator = await get_catalog_cache().aget(key)
+    if validator is None:
+        stats = await Product.objects.using(DEFAULT_DB_ALIAS).aaggregate(
+            count=Count("id"), modified=Max("updated_at")
+        )
+        validator = (stats["count"], stats["modified"])
+        await get_catalog_cache().aset(key, validator, timeout=_validator_timeout())
+    return validator
+
+
+def _response_key(version, key):
+    return f"catalog:v{version}:{key}"
+
+
+def get_cached_response(key):
+    """
+    Return the rendered bytes cached for key at the current catalog version.
+    """
+    return get_catalog_cache().get(_response_key(catalog_version(), key))
+
+
+def cache_response(key, content, version):
+    """
+    Store rendered bytes for key under the catalog version they were built at.
+    """
+    get_catalog_cache().set(
+        _response_key(version, key),
+        content,
+        timeout=_config().get("TIMEOUT", 300),
+    )
+
+
+async def aget_cached_response(key):
+    """
+    Async ``get_cached_response``.
+    """
+    version = await acatalog_version()
+    return await get_catalog_cache().aget(_response_key(version, key))
+
+
+async def acache_response(key, content, version):
+    """
+    Async ``cache_response``.
+    """
+    await get_catalog_cache().aset(
+        _response_key(version, key),
+        content,
+        timeout=_config().get("TIMEOUT", 300),
+    )
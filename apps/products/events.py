@@ -0,0 +1,260 @@
+"""
+Product change events.
+
+Stock and price changes are pushed to Server-Sent Events subscribers through
+an in-process hub. Every subscriber owns a bounded queue on its event loop;
+a subscriber whose queue fills up is dropped instead of buffering without
+limit, and reconnects on its own as SSE clients do. Publishers only schedule
+one callback per event loop, so idle connections cost a queue and a task.
+
+Events only reach clients connected to the same process.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import transaction
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+
+PRODUCT_EVENT_FIELDS = ("id", "name", "amount", "cost")
+
+
+def _config():
+    return getattr(settings, "PRODUCT_EVENTS", {})
+
+
+class Subscriber:
+    """
+    Bounded queue of encoded events owned by one stream.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    def deliver(self, message):
+        """
+        Queue message, dropping the subscriber if it fell behind.
+
+        Runs on the subscriber loop. A dropped subscriber gets its backlog
+        replaced by ``None`` so the stream closes instead of sending stale data.
+        """
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventHub:
+    """
+    Fan out events to the subscribers of every event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loops = {}
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, maxsize=None):
+        """
+        Register a subscriber on the running event loop.
+        """
+        if maxsize is None:
+            maxsize = _config().get("QUEUE_SIZE", 64)
+        subscriber = Subscriber(asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._loops.setdefault(subscriber.loop, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Stop delivering events to subscriber.
+        """
+        with self._lock:
+            subscribers = self._loops.get(subscriber.loop)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._loops[subscriber.loop]
+
+    def publish(self, event, data):
+        """
+        Encode an event once and hand it to every subscriber.
+
+        Safe to call from any thread; returns without waiting for delivery.
+        """
+        message = (
+            f"id: {next(self._sequence)}\n"
+            f"event: {event}\n"
+            f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+        ).encode()
+
+        with self._lock:
+            loops = [
+                (loop, list(subscribers)) for loop, subscribers in self._loops.items()
+            ]
+
+        for loop, subscribers in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, subscribers, message)
+            except RuntimeError:
+                # the loop is closed, its streams are gone
+                with self._lock:
+                    self._loops.pop(loop, None)
+
+    @staticmethod
+    def _deliver(subscribers, message):
+        for subscriber in subscribers:
+            subscriber.deliver(message)
+
+
+hub = EventHub()
+
+
+def publish_product_event(event, product):
+    """
+    Publish a product change once the current transaction commits.
+
+    :param str event: ``stock``, ``product`` or ``delete``
+    :param product: Product instance, or its id for deletes
+    """
+    if event == "delete":
+        data = {"id": product}
+    elif event == "stock":
+        data = {"id": product.id, "amount": product.amount}
+    else:
+        data = {field: getattr(product, field) for field in PRODUCT_EVENT_FIELDS}
+    transaction.on_commit(lambda: hub.publish(event, data))
+
+
+@sync_to_async
+def _session_user(scope):
+    """
+    Load the session user of an ASGI request.
+    """
+    headers = dict(scope.get("headers", ()))
+    cookies = parse_cookie(headers.get(b"cookie", b"").decode("latin1"))
+    request = HttpRequest()
+    engine = import_module(settings.SESSION_ENGINE)
+    request.session = engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    return get_user(request)
+
+
+async def _send_error(send, status_code, message):
+    body = json.dumps({"error": {"status_code": status_code, "message": message}})
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body.encode()})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class ProductEventStream:
+    """
+    ASGI application serving the product event stream.
+
+    Requests to ``PRODUCT_EVENTS["PATH"]`` are answered here with a
+    ``text/event-stream`` response, everything else goes to application.
+
+    * Requires session authentication.
+    * Sends ``stock`` events after purchases and ``product`` / ``delete``
+      events after product edits, as they commit.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != _config().get(
+            "PATH", "/api/product/events/"
+        ):
+            return await self.application(scope, receive, send)
+
+        if scope["method"] != "GET":
+            return await _send_error(
+                send, 405, f'Method "{scope["method"]}" not allowed.'
+            )
+
+        user = await _session_user(scope)
+        if not user.is_authenticated:
+            return await _send_error(
+                send, 403, "Authentication credentials were not provided."
+            )
+
+        return await self.stream(receive, send)
+
+    @staticmethod
+    async def stream(receive, send):
+        """
+        Send queued events until the client leaves or falls behind.
+        """
+        heartbeat = _config().get("HEARTBEAT", 15)
+        subscriber = hub.subscribe()
+        disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+        pending = None
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/event-stream"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no"),
+                    ],
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": b": connected\n\n",
+                    "more_body": True,
+                }
+            )
+
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(subscriber.queue.get())
+                done, _ = await asyncio.wait(
+                    {pending, disconnect},
+                    timeout=heartbeat,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnect in done:
+                    return
+                if pending in done:
+                    body, pending = pending.result(), None
+                    if body is None:
+                        break
+                else:
+                    body = b": keepalive\n\n"
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": True}
+                )
+
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            hub.unsubscribe(subscriber)
+            disconnect.cancel()
+            if pending is not None:
+                pending.cancel()
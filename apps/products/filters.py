@@ -0,0 +1,54 @@
+"""
+Product filters.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def _int_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: ["A valid integer is required."]})
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Filter products by query parameters.
+
+    * ``cost_min`` / ``cost_max`` - inclusive cost range
+    * ``user`` - seller id
+    * ``name`` - name prefix
+    * ``in_stock`` - ``true`` for products with a positive amount
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        cost_min = _int_param(request, "cost_min")
+        if cost_min is not None:
+            queryset = queryset.filter(cost__gte=cost_min)
+
+        cost_max = _int_param(request, "cost_max")
+        if cost_max is not None:
+            queryset = queryset.filter(cost__lte=cost_max)
+
+        seller = _int_param(request, "user")
+        if seller is not None:
+            queryset = queryset.filter(user_id=seller)
+
+        name = request.query_params.get("name")
+        if name:
+            queryset = queryset.filter(name__startswith=name)
+
+        in_stock = request.query_params.get("in_stock")
+        if in_stock is not None:
+            if in_stock not in ("true", "false"):
+                raise ValidationError({"in_stock": ["Must be true or false."]})
+            if in_stock == "true":
+                queryset = queryset.filter(amount__gt=0)
+            else:
+                queryset = queryset.filter(amount__lte=0)
+
+        return queryset
@@ -0,0 +1,147 @@
+"""
+Compare the sync and async read paths under concurrent ASGI requests.
+"""
+import asyncio
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from apps.products.cache import bump_catalog_version
+from apps.products.models import Product, ProductTombstone
+from apps.users.models import User
+from core.asgi import application
+
+ENDPOINTS = (
+    ("product-list", "product-list-async"),
+    ("user-status", "user-status-async"),
+)
+
+
+async def _get(path, cookie):
+    """
+    Send one GET request through the ASGI application.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"cookie", cookie)],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await application(scope, receive, send)
+    return status
+
+
+async def _run(path, cookie, requests, concurrency):
+    """
+    Issue requests GETs with at most concurrency in flight.
+
+    :return: (wall seconds, per request latencies)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            status = await _get(path, cookie)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise CommandError(f"{path} answered {status}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start, latencies
+
+
+class Command(BaseCommand):
+    """
+    Benchmark sync DRF views against their async counterparts in one process.
+
+    Requests go through ``core.asgi.application`` on a single event loop, as
+    one uvicorn worker would serve them. Sync views share the thread
+    sensitive executor while async views stay on the loop.
+
+    The benchmark commits its seller and products on the configured database
+    and deletes them afterwards, along with their tombstones. Run it against
+    a throwaway database: it refuses to run unless DEBUG is on or
+    ``--allow-writes`` is passed.
+    """
+
+    help = "Benchmark the sync and async product list and user status views."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--allow-writes",
+            action="store_true",
+            help="Run with DEBUG off, the database must be a throwaway one.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["allow_writes"]:
+            raise CommandError(
+                "The benchmark writes to the database, run it with DEBUG on "
+                "against a throwaway database or pass --allow-writes."
+            )
+
+        seller = User.objects.create(username="benchmark@seller.local", role="SELLER")
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        try:
+            Product.objects.bulk_create(
+                Product(name=f"Product {index}", amount=index, cost=index, user=seller)
+                for index in range(options["rows"])
+            )
+            session[SESSION_KEY] = str(seller.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = seller.get_session_auth_hash()
+            session.save()
+            cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}".encode()
+
+            for sync_name, async_name in ENDPOINTS:
+                for name in (sync_name, async_name):
+                    path = reverse(name)
+                    wall, latencies = asyncio.run(
+                        _run(path, cookie, options["requests"], options["concurrency"])
+                    )
+                    self.stdout.write(
+                        f"{name:<22}{options['requests'] / wall:10.0f} req/s"
+                        f"{statistics.median(latencies) * 1000:10.1f} ms p50"
+                        f"{statistics.quantiles(latencies, n=100)[98] * 1000:10.1f}"
+                        " ms p99"
+                    )
+        finally:
+            session.delete()
+            product_ids = list(
+                Product.objects.filter(user=seller).values_list("id", flat=True)
+            )
+            seller.delete()
+            # benchmark rows must not reach clients of the changes feed
+            ProductTombstone.objects.filter(product_id__in=product_ids).delete()
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS("Done"))
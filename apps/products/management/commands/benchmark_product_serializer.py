@@ -0,0 +1,68 @@
+"""
+Compare ProductSerializer with the read only fast path.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.products.models import Product
+from apps.products.serializers import ProductReadSerializer, ProductSerializer
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark catalog serialization on throwaway rows.
+    """
+
+    help = "Benchmark ProductSerializer against ProductReadSerializer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+
+        with transaction.atomic():
+            seller = User.objects.create(
+                username="benchmark@seller.local", role="SELLER"
+            )
+            Product.objects.bulk_create(
+                Product(name=f"Product {index}", amount=index, cost=index, user=seller)
+                for index in range(options["rows"])
+            )
+            queryset = Product.objects.filter(user=seller).order_by("id")
+
+            def model_serializer():
+                return renderer.render(
+                    ProductSerializer(queryset.all(), many=True).data
+                )
+
+            def read_serializer():
+                return renderer.render(
+                    ProductReadSerializer().serialize(queryset.all())
+                )
+
+            if model_serializer() != read_serializer():
+                raise CommandError("Fast path output differs from ProductSerializer")
+
+            timings = {}
+            for name, func in (
+                ("ProductSerializer", model_serializer),
+                ("ProductReadSerializer", read_serializer),
+            ):
+                best = float("inf")
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    func()
+                    best = min(best, time.perf_counter() - start)
+                timings[name] = best
+                self.stdout.write(f"{name:<24}{best * 1000:10.1f} ms")
+
+            transaction.set_rollback(True)
+
+        speedup = timings["ProductSerializer"] / timings["ProductReadSerializer"]
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {speedup:.1f}x"))
@@ -0,0 +1,18 @@
+"""
+Delete product tombstones past the retention window.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products.services import compact_tombstones
+
+
+class Command(BaseCommand):
+    """
+    Compact product tombstones older than ``PRODUCT_TOMBSTONE_RETENTION``.
+    """
+
+    help = "Delete product tombstones past the retention window."
+
+    def handle(self, *args, **options):
+        deleted = compact_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones"))
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.1 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_rename_user_id_product_user"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["created_at", "id"], name="products_created_id_idx"
+            ),
+        ),
+    ]
@@ -28,3 +28,40 @@ class Product(BaseClass):
         db_table = "products"
         verbose_name = "Product"
         verbose_name_plural = "Products"
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="products_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="products_updated_id_idx"),
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(amount__gt=0),
+                name="products_in_stock_idx",
+            ),
+            models.Index(
+                fields=["user", "created_at", "id"], name="products_user_created_idx"
+            ),
+            models.Index(fields=["cost", "id"], name="products_cost_id_idx"),
+            models.Index(
+                fields=["name"],
+                opclasses=["varchar_pattern_ops"],
+                name="products_name_prefix_idx",
+            ),
+        ]
+
+
+class ProductTombstone(models.Model):
+    """
+    Product tombstone database model.
+    Used for reporting deleted products to delta sync clients.
+    """
+
+    product_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        """
+        Meta class.
+        """
+
+        db_table = "product_tombstones"
+        verbose_name = "Product tombstone"
+        verbose_name_plural = "Product tombstones"
@@ -1,16 +1,102 @@
 """
 Product serializer.
 """
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
+from common.metrics import TimedDataMixin, serializer_timer
+
 from .models import Product
 
 
-class ProductSerializer(serializers.ModelSerializer):
+def _bulk_config():
+    return getattr(settings, "PRODUCT_BULK", {})
+
+
+class ProductBulkSerializer(TimedDataMixin, serializers.ListSerializer):
+    """
+    Product list serializer writing with bulk queries.
+
+    Items are validated one by one so that invalid items are reported by
+    index without rejecting the rest of the batch.
+    """
+
+    def validate_items(self):
+        """
+        Validate every item of the initial data.
+
+        ```
+        :return: (valid, errors) where valid is a list of (index, item, data)
+        :raise: ValidationError if the payload is not a list or is too long
+        ```
+        """
+        if not isinstance(self.initial_data, list):
+            raise serializers.ValidationError("Expected a list of products.")
+        if len(self.initial_data) > _bulk_config().get("MAX_ITEMS", 5000):
+            raise serializers.ValidationError("Too many products in one request.")
+
+        valid, errors = [], {}
+        for index, item in enumerate(self.initial_data):
+            try:
+                valid.append((index, item, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+        return valid, errors
+
+    def create(self, validated_data):
+        """
+        Insert products in chunks of ``PRODUCT_BULK["CHUNK_SIZE"]`` rows.
+        """
+        with transaction.atomic():
+            return Product.objects.bulk_create(
+                [Product(**attrs) for attrs in validated_data],
+                batch_size=_bulk_config().get("CHUNK_SIZE", 500),
+            )
+
+    def update(self, instance, validated_data):
+        """
+        Update products in chunks of ``PRODUCT_BULK["CHUNK_SIZE"]`` rows.
+
+        ```
+        :param list instance: Products to update
+        :param list validated_data: New attributes, in the same order
+        ```
+        """
+        now = timezone.now()
+        fields = {"updated_at"}
+        for product, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(product, attr, value)
+            product.updated_at = now
+            fields.update(attrs)
+
+        with transaction.atomic():
+            Product.objects.bulk_update(
+                instance,
+                sorted(fields),
+                batch_size=_bulk_config().get("CHUNK_SIZE", 500),
+            )
+        return instance
+
+
+class ProductSerializer(TimedDataMixin, serializers.ModelSerializer):
     """
     Product serializer.
+
+    Pass ``fields`` to only render a subset of ``Meta.fields``.
     """
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         """
         Meta class.
@@ -27,3 +113,92 @@ class ProductSerializer(serializers.ModelSerializer):
             "id",
             "user",
         )
+        list_serializer_class = ProductBulkSerializer
+
+
+def parse_fields(value):
+    """
+    Parse a comma separated ``?fields=`` value.
+
+    ```
+    :param str value: Requested field names
+    :return: tuple of field names in ``Meta.fields`` order, or None for all
+    :raise: ValidationError if a field is not part of ProductSerializer
+    ```
+    """
+    requested = {name.strip() for name in (value or "").split(",") if name.strip()}
+    if not requested:
+        return None
+
+    allowed = ProductSerializer.Meta.fields
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": [f"Unknown field(s): {', '.join(unknown)}"]}
+        )
+    return tuple(name for name in allowed if name in requested)
+
+
+class ProductReadSerializer:
+    """
+    Read only fast path producing the same output as ``ProductSerializer``.
+
+    Rows are loaded with ``values_list`` and mapped to dicts through the
+    precomputed field names, skipping per row field objects and the related
+    field lookup. Trailing values beyond the selected fields are ignored.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = tuple(fields or ProductSerializer.Meta.fields)
+
+    def rows(self, queryset):
+        """
+        Restrict queryset to the serialized columns.
+        """
+        return queryset.values_list(*self.fields)
+
+    def to_representation(self, rows):
+        """
+        Map value rows to output dicts.
+        """
+        names = self.fields
+        with serializer_timer():
+            return [dict(zip(names, row)) for row in rows]
+
+    def serialize(self, queryset):
+        """
+        Serialize every product of queryset.
+        """
+        return self.to_representation(self.rows(queryset))
+
+    def stream(self, queryset, chunk_size=2000, ndjson=False):
+        """
+        Yield queryset as JSON text, one chunk of rows at a time.
+
+        Rows are read through ``iterator()``, which uses a server side cursor
+        on PostgreSQL, so memory use does not grow with the table size.
+
+        :param QuerySet queryset: Products to export
+        :param int chunk_size: Rows fetched and emitted per chunk
+        :param bool ndjson: Emit one JSON document per line instead of an array
+        """
+        encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        rows = self.rows(queryset).iterator(chunk_size=chunk_size)
+        names = self.fields
+        separator = "\n" if ndjson else ","
+
+        if not ndjson:
+            yield "["
+        first = True
+        while True:
+            chunk = [encode(dict(zip(names, row))) for row in islice(rows, chunk_size)]
+            if not chunk:
+                break
+            text = separator.join(chunk)
+            if ndjson:
+                yield text + "\n"
+            else:
+                yield text if first else "," + text
+            first = False
+        if not ndjson:
+            yield "]"
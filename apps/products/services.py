@@ -1,9 +1,136 @@
 """
 Product services.
 """
-from rest_framework.exceptions import ValidationError
+from datetime import timedelta
 
-from .models import Product
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from apps.users.models import User
+from apps.users.services import COIN_DENOMINATIONS
+from apps.users.signals import user_updated
+from common.db import update_returning
+from common.pagination import decode_cursor, encode_cursor, keyset_filter
+
+from .cache import bump_catalog_version
+from .events import publish_product_event
+from .models import Product, ProductTombstone
+from .serializers import ProductReadSerializer
+
+PRODUCT_FIELDS = ("id", "name", "amount", "cost", "user_id", "updated_at")
+CHECKOUT_MAX_ITEMS = 100
+
+
+def compute_change(amount):
+    """
+    Split amount into coins, largest denomination first
+
+    :param int amount: Amount to give back
+    :return: dict mapping each denomination used to its coin count
+    """
+    change = {}
+    for coin in COIN_DENOMINATIONS:
+        count, amount = divmod(amount, coin)
+        if count:
+            change[coin] = count
+    return change
+
+
+def expand_change(change):
+    """
+    Legacy change format with one list element per coin
+
+    :param dict change: Coin counts as returned by compute_change
+    """
+    return [coin for coin, count in change.items() for _ in range(count)]
+
+
+def _reserve_stock(product_id, quantity):
+    """
+    Decrement the stock of a product only if enough is available
+
+    :param int product_id: Product id
+    :param int quantity: Quantity to take
+    :return: Product with the updated amount
+    :raise: ValidationError if the product is missing or sold out
+    """
+    products = update_returning(
+        Product.objects.filter(id=product_id, amount__gte=quantity),
+        PRODUCT_FIELDS,
+        amount=F("amount") - quantity,
+        updated_at=timezone.now(),
+    )
+    if not products:
+        if Product.objects.filter(id=product_id).exists():
+            raise ValidationError(
+                "The requested quantity exceeds the available quantity."
+            )
+        raise ValidationError("Product not found")
+    return products[0]
+
+
+def _debit_deposit(user, spending):
+    """
+    Debit the deposit only if the user has enough money
+
+    :param User user: User instance
+    :param int spending: Amount to debit
+    :return: The new deposit
+    :raise: ValidationError if the deposit is too low
+    """
+    buyers = update_returning(
+        User.objects.filter(pk=user.pk, deposit__gte=spending),
+        ("id", "deposit"),
+        deposit=F("deposit") - spending,
+    )
+    if not buyers:
+        raise ValidationError("Not enough deposit available. Please insert more coins.")
+    return buyers[0].deposit
+
+
+def _purchase(user, items, keyed_errors=False):
+    """
+    Reserve stock for every item and debit the total in one transaction
+
+    Product rows are updated in ascending id order, so concurrent checkouts
+    always take row locks in the same order and cannot deadlock.
+
+    :param User user: User instance
+    :param list items: (product_id, quantity) pairs sorted by product id
+    :param bool keyed_errors: Report stock errors keyed by product id
+    :return: (products, spending)
+    """
+    products = []
+    try:
+        with transaction.atomic():
+            for product_id, quantity in items:
+                try:
+                    products.append(_reserve_stock(product_id, quantity))
+                except ValidationError as exc:
+                    if not keyed_errors:
+                        raise
+                    raise ValidationError({str(product_id): exc.detail})
+
+            spending = sum(
+                product.cost * quantity
+                for product, (_, quantity) in zip(products, items)
+            )
+            deposit = _debit_deposit(user, spending)
+    except DatabaseError:
+        raise ValidationError("Error while saving the product or user")
+
+    bump_catalog_version()
+    for product in products:
+        publish_product_event("stock", product)
+    user.deposit = deposit
+    user_updated.send(sender=User, instance=user)
+
+    return products, spending
 
 
 def buy_product(user=None, payload=None):
@@ -11,6 +138,10 @@ def buy_product(user=None, payload=None):
     Buy product using payload data
     User has to have the role of a BUYER
 
+    The stock decrement and the deposit debit are applied as guarded
+    conditional updates in one transaction, so concurrent buyers can never
+    oversell a product or overdraw a deposit.
+
     :param dict payload: Request data payload
     :param User user: User instance
     """
@@ -18,48 +149,169 @@ def buy_product(user=None, payload=None):
         payload is None
         or not isinstance(payload, dict)
         or not isinstance(payload["quantity"], int)
+        or payload["quantity"] < 1
     ):
         raise ValidationError("Invalid input.")
 
-    # retrieve the product
-    product = Product.objects.filter(id=payload["product_id"]).first()
+    products, spending = _purchase(user, [(payload["product_id"], payload["quantity"])])
 
-    if product:
-        spending = product.cost * payload["quantity"]
+    return compute_change(user.deposit), spending, products[0]
 
-        # check if the amount is enough
-        if product.amount < payload["quantity"]:
-            raise ValidationError(
-                "The requested quantity exceeds the available quantity."
-            )
 
-        # check if the user has enough money
-        if user.deposit < spending:
-            raise ValidationError(
-                "Not enough deposit available. Please insert more coins."
-            )
+def checkout(user=None, payload=None):
+    """
+    Buy several products at once using payload data
+    User has to have the role of a BUYER
+
+    Follows buy_product semantics for every item, but all products and the
+    single deposit debit are committed together or not at all.
+
+    :param dict payload: Request data payload with a list of items
+    :param User user: User instance
+    """
+    items = payload.get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not 0 < len(items) <= CHECKOUT_MAX_ITEMS:
+        raise ValidationError("Invalid input.")
+
+    quantities = {}
+    for item in items:
+        if (
+            not isinstance(item, dict)
+            or not isinstance(item.get("product_id"), int)
+            or not isinstance(item.get("quantity"), int)
+            or item["quantity"] < 1
+        ):
+            raise ValidationError("Invalid input.")
+        product_id = item["product_id"]
+        quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+
+    products, spending = _purchase(user, sorted(quantities.items()), keyed_errors=True)
+
+    return compute_change(user.deposit), spending, products
+
 
-        # update the product amount
-        if product.amount == payload["quantity"]:
-            product.amount = 0
-        else:
-            product.amount -= payload["quantity"]
+class SyncTokenExpired(APIException):
+    """
+    Raised when a sync token predates the tombstone retention window.
+    """
+
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync token expired, start a full sync"
+    default_code = "sync_token_expired"
 
-        # update the user deposit
-        user.deposit -= spending
-        change = user.deposit
-        change_list = []
 
-        for i in [100, 50, 20, 10, 5]:
-            while change >= i:
-                change_list.append(i)
-                change -= i
+def _tombstone_retention():
+    return timedelta(seconds=getattr(settings, "PRODUCT_TOMBSTONE_RETENTION", 604800))
 
+
+def _sync_position(value):
+    """
+    Parse a ``(timestamp, id)`` position of a sync token.
+
+    :raise: ValidationError if the position is malformed
+    """
+    if value is None:
+        return None
+    try:
+        moment, row_id = value
+        moment, row_id = parse_datetime(moment), int(row_id)
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid sync token")
+    if moment is None:
+        raise ValidationError("Invalid sync token")
+    return [moment, row_id]
+
+
+def changes_since(token=None, limit=500):
+    """
+    List products changed and deleted since a sync token
+
+    Products are walked by ``(updated_at, id)`` and tombstones by
+    ``(deleted_at, id)``. Both are stamped before their transaction commits,
+    so a row may become visible after later stamped ones were reported. Once
+    a client has caught up, its token therefore steps back to
+    ``PRODUCT_CHANGES_LAG`` seconds ago, and the next call reports the rows
+    of that window again together with any that committed late.
+
+    :param str token: Token returned by a previous call, None to start over
+    :param int limit: Maximum number of changes and of deletions returned
+    :return: dict with changes, deleted product ids, next token and has_more
+    :raise: SyncTokenExpired if deletions since the token were compacted
+    :raise: ValidationError if the token is malformed
+    """
+    now = timezone.now()
+    settled = [now - timedelta(seconds=getattr(settings, "PRODUCT_CHANGES_LAG", 10)), 0]
+
+    if token:
         try:
-            product.save()
-            user.save()
-        except Exception:
-            raise ValidationError("Error while saving the product or user")
+            cursor = decode_cursor(token)
+            position, deleted_position = cursor["p"], cursor["t"]
+            issued_at = parse_datetime(cursor["s"])
+        except (NotFound, KeyError, TypeError, ValueError):
+            raise ValidationError("Invalid sync token")
+        if issued_at is None:
+            raise ValidationError("Invalid sync token")
+        position = _sync_position(position)
+        deleted_position = _sync_position(deleted_position)
+        if now - issued_at > _tombstone_retention():
+            raise SyncTokenExpired()
+    else:
+        # a full sync has nothing to delete, only later tombstones matter
+        position, deleted_position, issued_at = None, settled, now
+
+    reader = ProductReadSerializer()
+    products = Product.objects.all()
+    if position:
+        products = products.filter(keyset_filter(("updated_at", "id"), position))
+    rows = list(
+        products.order_by("updated_at", "id").values_list(
+            *reader.fields, "updated_at", "id"
+        )[: limit + 1]
+    )
 
-        return change_list, spending, product
-    raise ValidationError("Product not found")
+    tombstones = ProductTombstone.objects.all()
+    if deleted_position:
+        tombstones = tombstones.filter(
+            keyset_filter(("deleted_at", "id"), deleted_position)
+        )
+    tombstones = list(
+        tombstones.order_by("deleted_at", "id").values_list(
+            "product_id", "deleted_at", "id"
+        )[: limit + 1]
+    )
+
+    has_more = len(rows) > limit or len(tombstones) > limit
+    rows, tombstones = rows[:limit], tombstones[:limit]
+
+    if rows:
+        position = list(rows[-1][-2:])
+    if tombstones:
+        deleted_position = list(tombstones[-1][-2:])
+    if not has_more:
+        position = min(position or settled, settled)
+        deleted_position = min(deleted_position, settled)
+
+    # the retention clock keeps running from the token the client started
+    # with until it has caught up with every change
+    next_token = encode_cursor(
+        {"p": position, "t": deleted_position, "s": issued_at if has_more else now}
+    )
+
+    return {
+        "changes": reader.to_representation(rows),
+        "deleted": [product_id for product_id, _, _ in tombstones],
+        "next": next_token,
+        "has_more": has_more,
+    }
+
+
+def compact_tombstones():
+    """
+    Delete tombstones older than ``PRODUCT_TOMBSTONE_RETENTION`` seconds
+
+    :return: number of deleted tombstones
+    """
+    deleted, _ = ProductTombstone.objects.filter(
+        deleted_at__lt=timezone.now() - _tombstone_retention()
+    ).delete()
+    return deleted
@@ -0,0 +1,15 @@
+"""
+Product signals.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Product, ProductTombstone
+
+
+@receiver(post_delete, sender=Product)
+def record_tombstone(sender, instance, **kwargs):
+    """
+    Record a deleted product, including deletes cascaded from its seller.
+    """
+    ProductTombstone.objects.create(product_id=instance.pk)
@@ -0,0 +1,126 @@
+"""
+Product ASGI tests.
+"""
+import io
+import json
+
+from asgiref.sync import async_to_sync
+
+# django
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+# local api
+from apps.products.models import Product, ProductTombstone
+from apps.products.serializers import ProductReadSerializer
+from apps.products.tests import ProductTestCase
+from apps.users.models import User
+from core.asgi import application
+
+
+class ProductExportTests(ProductTestCase):
+    """
+    Test the streamed product export.
+    """
+
+    def test_product_export_streams_catalog(self):
+        """
+        Product export streams every product as JSON and NDJSON.
+        """
+        user_login = reverse("user-login")
+        product_export = reverse("product-export")
+        user = User.objects.get(username=self.user1_seller["username"])
+        Product.objects.bulk_create(
+            Product(user=user, name=f"P{index}", amount=index, cost=index)
+            for index in range(5)
+        )
+        expected = ProductReadSerializer().serialize(Product.objects.order_by("id"))
+        self.client.post(user_login, self.user1_seller, format="json")
+
+        with self.settings(PRODUCT_EXPORT_CHUNK_SIZE=2):
+            response = self.client.get(product_export)
+            content = b"".join(response.streaming_content)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(content), expected)
+
+            response = self.client.get(f"{product_export}?output=ndjson")
+            lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+
+class ProductExportASGITests(TransactionTestCase):
+    """
+    Test the product export served by the ASGI application.
+    """
+
+    def test_product_export_streams_over_asgi(self):
+        """
+        Product export reads its chunks from the database under ASGI.
+        """
+        user = User.objects.create_user(
+            username="seller@email.com", password="test1234", role="SELLER"
+        )
+        Product.objects.bulk_create(
+            Product(user=user, name=f"P{index}", amount=index, cost=index)
+            for index in range(5)
+        )
+        expected = ProductReadSerializer().serialize(Product.objects.order_by("id"))
+        self.client.force_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.session.session_key}"
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": reverse("product-export"),
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        }
+
+        async def export():
+            sent = []
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                sent.append(message)
+
+            await application(scope, receive, send)
+            return sent
+
+        with self.settings(PRODUCT_EXPORT_CHUNK_SIZE=2):
+            sent = async_to_sync(export)()
+
+        self.assertEqual(sent[0]["status"], 200)
+        content = b"".join(message.get("body", b"") for message in sent[1:])
+        self.assertEqual(json.loads(content), expected)
+
+
+class ProductBenchmarkCommandTests(TransactionTestCase):
+    """
+    Test the async read benchmark command.
+    """
+
+    def test_benchmark_async_reads_cleans_up(self):
+        """
+        Product read benchmark needs an opt-in and leaves no rows behind.
+        """
+        with self.assertRaises(CommandError):
+            call_command("benchmark_async_reads", stdout=io.StringIO())
+
+        with self.settings(ALLOWED_HOSTS=["localhost"]):
+            call_command(
+                "benchmark_async_reads",
+                rows=3,
+                requests=2,
+                concurrency=1,
+                allow_writes=True,
+                stdout=io.StringIO(),
+            )
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(ProductTombstone.objects.exists())
@@ -0,0 +1,135 @@
+"""
+Product catalog cache tests.
+"""
+import time
+
+# django
+from django.urls import reverse
+from django.utils.http import http_date
+
+# local api
+from apps.products.cache import catalog_version, get_catalog_cache
+from apps.products.models import Product
+from apps.products.tests import ProductTestCase
+from apps.users.models import User
+
+
+class ProductCacheTests(ProductTestCase):
+    """
+    Test the product catalog cache and conditional GETs.
+    """
+
+    def test_product_list_cached_between_writes(self):
+        """
+        Product list is served from the catalog cache until a product write.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_list = reverse("product-list")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        first = self.client.get(product_list, format="json")
+        # the session row only, the user comes from the user cache
+        with self.assertNumQueries(1):
+            second = self.client.get(product_list, format="json")
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.content, second.content)
+
+        version = catalog_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(product_create, self.product_2, format="json")
+        # the version only moves once the write has committed
+        self.assertEqual(catalog_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(catalog_version(), version)
+        response = self.client.get(product_list, format="json")
+
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_product_list_not_modified(self):
+        """
+        Product list answers 304 to a matching ETag until the catalog changes.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_list = reverse("product-list")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        response = self.client.get(product_list, format="json")
+        etag = response["ETag"]
+        # the newest updated_at does not move on deletes
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        response = self.client.get(product_list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(product_create, self.product_2, format="json")
+        response = self.client.get(product_list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        product_id = Product.objects.get(name=self.product_2["name"]).id
+        since = http_date(time.time() + 60)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("product-update-delete", kwargs={"product_id": product_id})
+            )
+        response = self.client.get(product_list, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_product_list_write_in_other_worker(self):
+        """
+        Product list picks up writes that did not bump this process's catalog
+        version once the cached validator expires.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_list = reverse("product-list")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        response = self.client.get(product_list, format="json")
+        etag = response["ETag"]
+
+        # written without running the on_commit bump, like another worker
+        seller = User.objects.get(username=self.user1_seller["username"])
+        Product.objects.create(user=seller, **self.product_2)
+        response = self.client.get(product_list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        get_catalog_cache().delete(f"catalog:v{catalog_version()}:validator")
+        response = self.client.get(product_list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_product_detail_not_modified(self):
+        """
+        Product detail answers 304 to a matching ETag until the product changes.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        product_detail = reverse(
+            "product-update-delete", kwargs={"product_id": product_id}
+        )
+        etag = self.client.get(product_detail, format="json")["ETag"]
+
+        response = self.client.get(product_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.put(product_detail, self.product_2, format="json")
+        response = self.client.get(product_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], self.product_2["name"])
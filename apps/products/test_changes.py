@@ -0,0 +1,137 @@
+"""
+Product changes feed tests.
+"""
+import io
+from datetime import timedelta
+
+# django
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+# local api
+from apps.products.models import Product, ProductTombstone
+from apps.products.tests import ProductTestCase
+from apps.users.models import User
+from common.pagination import encode_cursor
+
+
+class ProductChangesTests(ProductTestCase):
+    """
+    Test the product changes feed and its tombstones.
+    """
+
+    def test_product_changes_since(self):
+        """
+        Product changes only report writes and deletes after the sync token.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_changes = reverse("product-changes")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+        self.client.post(product_create, self.product_2, format="json")
+
+        response = self.client.get(product_changes, format="json")
+        json_response = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json_response["changes"]), 2)
+        self.assertEqual(json_response["deleted"], [])
+        self.assertFalse(json_response["has_more"])
+
+        product_1_id = Product.objects.get(name=self.product_1["name"]).id
+        product_2_id = Product.objects.get(name=self.product_2["name"]).id
+        self.client.put(
+            reverse("product-update-delete", kwargs={"product_id": product_1_id}),
+            {**self.product_1, "cost": 5},
+            format="json",
+        )
+        self.client.delete(
+            reverse("product-update-delete", kwargs={"product_id": product_2_id})
+        )
+
+        since = json_response["next"]
+        response = self.client.get(f"{product_changes}?since={since}", format="json")
+        json_response = response.json()
+
+        self.assertEqual([p["id"] for p in json_response["changes"]], [product_1_id])
+        self.assertEqual(json_response["changes"][0]["cost"], 5)
+        self.assertEqual(json_response["deleted"], [product_2_id])
+
+        with self.settings(PRODUCT_TOMBSTONE_RETENTION=-1):
+            response = self.client.get(
+                f"{product_changes}?since={json_response['next']}", format="json"
+            )
+
+        self.assertEqual(response.status_code, 410)
+
+    def test_product_changes_since_late_commit(self):
+        """
+        Product changes report a write committed after later stamped ones.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_changes = reverse("product-changes")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+        since = self.client.get(product_changes, format="json").json()["next"]
+
+        # stamped before the last call, but only committed after it
+        self.client.post(product_create, self.product_2, format="json")
+        Product.objects.filter(name=self.product_2["name"]).update(
+            updated_at=timezone.now() - timedelta(seconds=5)
+        )
+
+        response = self.client.get(f"{product_changes}?since={since}", format="json")
+        self.assertIn(
+            self.product_2["name"], [p["name"] for p in response.json()["changes"]]
+        )
+
+        for position in (["garbage", 1], [timezone.now().isoformat(), "x"], [1]):
+            token = encode_cursor(
+                {"p": position, "t": None, "s": timezone.now().isoformat()}
+            )
+            response = self.client.get(
+                f"{product_changes}?since={token}", format="json"
+            )
+            self.assertEqual(response.status_code, 400)
+        token = encode_cursor({"p": None, "t": 5, "s": timezone.now().isoformat()})
+        response = self.client.get(f"{product_changes}?since={token}", format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f"{product_changes}?since=bogus", format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_product_compact_tombstones_command(self):
+        """
+        Product tombstone compaction only deletes tombstones past retention.
+        """
+        old = ProductTombstone.objects.create(product_id=1)
+        recent = ProductTombstone.objects.create(product_id=2)
+        ProductTombstone.objects.filter(id=old.id).update(
+            deleted_at=timezone.now()
+            - timedelta(seconds=settings.PRODUCT_TOMBSTONE_RETENTION + 60)
+        )
+        output = io.StringIO()
+
+        call_command("compact_product_tombstones", stdout=output)
+
+        self.assertEqual(
+            list(ProductTombstone.objects.values_list("id", flat=True)), [recent.id]
+        )
+        self.assertIn("Deleted 1 tombstones", output.getvalue())
+
+    def test_product_tombstones_on_user_delete(self):
+        """
+        Products deleted with their seller leave tombstones behind.
+        """
+        user = User.objects.get(username=self.user1_seller["username"])
+        product = Product.objects.create(user=user, **self.product_1)
+
+        user.delete()
+
+        self.assertEqual(
+            list(ProductTombstone.objects.values_list("product_id", flat=True)),
+            [product.id],
+        )
@@ -0,0 +1,79 @@
+"""
+Product event stream tests.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync
+
+# django
+from django.conf import settings
+from django.urls import reverse
+
+# local api
+from apps.products.events import ProductEventStream, hub
+from apps.products.tests import ProductTestCase
+
+
+class ProductEventsTests(ProductTestCase):
+    """
+    Test the product event stream.
+    """
+
+    def test_product_events_stream(self):
+        """
+        Product events are pushed to authenticated stream subscribers.
+        """
+        self.client.post(reverse("user-login"), self.user3_buyer, format="json")
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.session.session_key}"
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": settings.PRODUCT_EVENTS["PATH"],
+            "headers": [(b"cookie", cookie.encode())],
+        }
+
+        async def stream():
+            sent, disconnected = [], asyncio.Event()
+
+            async def receive():
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+                if len(sent) == 2:
+                    hub.publish("stock", {"id": 1, "amount": 9})
+                elif len(sent) == 3:
+                    disconnected.set()
+
+            await ProductEventStream(None)(scope, receive, send)
+            return sent
+
+        sent = async_to_sync(stream)()
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), sent[0]["headers"])
+        self.assertIn(b'event: stock\ndata: {"id":1,"amount":9}\n\n', sent[2]["body"])
+
+        self.client.logout()
+        sent = async_to_sync(stream)()
+        self.assertEqual(sent[0]["status"], 403)
+
+    def test_product_events_drop_slow_subscriber(self):
+        """
+        Product event subscribers with a full queue are dropped.
+        """
+
+        async def overflow():
+            subscriber = hub.subscribe(maxsize=2)
+            for amount in range(3):
+                hub.publish("stock", {"id": 1, "amount": amount})
+            await asyncio.sleep(0)
+            hub.unsubscribe(subscriber)
+            return subscriber
+
+        subscriber = async_to_sync(overflow)()
+
+        self.assertTrue(subscriber.dropped)
+        self.assertIsNone(subscriber.queue.get_nowait())
+        self.assertTrue(subscriber.queue.empty())
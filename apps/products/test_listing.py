@@ -0,0 +1,265 @@
+"""
+Product list tests.
+"""
+# django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# rest framework
+from rest_framework.renderers import JSONRenderer
+
+# local api
+from apps.products.models import Product
+from apps.products.serializers import ProductReadSerializer, ProductSerializer
+from apps.products.tests import ProductTestCase
+from apps.users.models import User
+from common.pagination import encode_cursor
+
+
+class ProductListTests(ProductTestCase):
+    """
+    Test product list pagination, filters, sparse fields and serializers.
+    """
+
+    def test_product_list_cursor_pagination(self):
+        """
+        Product list walks pages forwards and backwards by cursor.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_list = reverse("product-list")
+        self.client.post(user_login, self.user1_seller, format="json")
+        for index in range(5):
+            self.client.post(
+                product_create, {**self.product_1, "name": f"P{index}"}, format="json"
+            )
+
+        names = []
+        url = f"{product_list}?page_size=2"
+        while url:
+            response = self.client.get(url, format="json")
+            self.assertEqual(response.status_code, 200)
+            names.extend(product["name"] for product in response.json()["results"])
+            last_page = response.json()
+            url = last_page["next"]
+
+        self.assertEqual(names, ["P0", "P1", "P2", "P3", "P4"])
+        self.assertIsNotNone(last_page["previous"])
+
+        response = self.client.get(last_page["previous"], format="json")
+        self.assertEqual(
+            [product["name"] for product in response.json()["results"]], ["P2", "P3"]
+        )
+
+    def test_product_list_invalid_cursor(self):
+        """
+        Product list rejects a malformed cursor.
+        """
+        user_login = reverse("user-login")
+        product_list = reverse("product-list")
+        self.client.post(user_login, self.user1_seller, format="json")
+
+        response = self.client.get(f"{product_list}?cursor=bogus", format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"]["message"], "Invalid cursor")
+
+        for position in (["garbage", 1], ["2022-01-01T00:00:00", "x"], [None, 1]):
+            token = encode_cursor({"p": position})
+            response = self.client.get(f"{product_list}?cursor={token}", format="json")
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json()["error"]["message"], "Invalid cursor")
+
+    def test_product_list_async_matches_sync(self):
+        """
+        Product list on the async path returns the same pages as the sync view.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        self.client.post(user_login, self.user1_seller, format="json")
+        for index in range(3):
+            self.client.post(
+                product_create, {**self.product_1, "name": f"P{index}"}, format="json"
+            )
+        self.async_client.cookies = self.client.cookies
+        query = "?page_size=2&in_stock=true&fields=id,name"
+
+        expected = self.client.get(reverse("product-list") + query, format="json")
+        response = self.async_get(reverse("product-list-async") + query)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], expected.json()["results"])
+        self.assertIn("cursor=", response.json()["next"])
+
+        response = self.async_get(
+            reverse("product-list-async") + query, **{"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.async_get(reverse("product-list-async") + "?cursor=bogus")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"]["message"], "Invalid cursor")
+
+    def test_product_list_metrics(self):
+        """
+        Product list latency, queries and serializer time reach /metrics/.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+        self.client.get(reverse("product-list"), format="json")
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer scrape")
+        with self.settings(METRICS={**settings.METRICS, "TOKEN": "scrape"}):
+            response = self.client.get(reverse("metrics"))
+        metrics = {
+            line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in response.content.decode().splitlines()
+            if not line.startswith("#")
+        }
+        labels = 'route="api/product/list/",method="GET"'
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(
+            metrics[f"http_request_duration_seconds_count{{{labels}}}"], 1
+        )
+        self.assertGreaterEqual(metrics[f"db_queries_total{{{labels}}}"], 1)
+        self.assertGreater(metrics[f"serializer_seconds_total{{{labels}}}"], 0)
+        self.assertGreaterEqual(
+            metrics[f'http_responses_total{{{labels},status="200"}}'], 1
+        )
+
+    def test_product_read_serializer_matches(self):
+        """
+        Product read fast path renders the same bytes as ProductSerializer.
+        """
+        user = User.objects.get(username=self.user1_seller["username"])
+        Product.objects.create(user=user, **self.product_1)
+        Product.objects.create(user=user, **self.product_2)
+        queryset = Product.objects.order_by("id")
+
+        self.assertEqual(
+            JSONRenderer().render(ProductReadSerializer().serialize(queryset)),
+            JSONRenderer().render(ProductSerializer(queryset, many=True).data),
+        )
+
+    def test_product_list_sparse_fields(self):
+        """
+        Product list only selects and renders the requested fields.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        product_list = reverse("product-list")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{product_list}?fields=name,id", format="json")
+
+        product_selects = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"products"' in query["sql"] and "COUNT(" not in query["sql"]
+        ]
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": product_id, "name": self.product_1["name"]}],
+        )
+        self.assertEqual(len(product_selects), 1)
+        self.assertNotIn('"cost"', product_selects[0])
+
+        # an empty selection means every field
+        response = self.client.get(f"{product_list}?fields=", format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.json()["results"][0]), set(ProductSerializer.Meta.fields)
+        )
+
+    def test_product_detail_sparse_fields(self):
+        """
+        Product detail renders the requested fields and rejects unknown ones.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        product_detail = reverse(
+            "product-update-delete", kwargs={"product_id": product_id}
+        )
+        response = self.client.get(f"{product_detail}?fields=cost", format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"cost": self.product_1["cost"]})
+
+        response = self.client.get(
+            f"{product_detail}?fields=cost,secret", format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["message"]["fields"][0], "Unknown field(s): secret"
+        )
+
+    def test_product_list_filters_and_ordering(self):
+        """
+        Product list filters by cost, seller, name and stock and orders by cost.
+        """
+        user_login = reverse("user-login")
+        product_list = reverse("product-list")
+        seller_1 = User.objects.get(username=self.user1_seller["username"])
+        seller_2 = User.objects.get(username=self.user2_seller["username"])
+        Product.objects.create(user=seller_1, name="Apple", amount=0, cost=30)
+        Product.objects.create(user=seller_1, name="Apricot", amount=5, cost=10)
+        Product.objects.create(user=seller_2, name="Banana", amount=5, cost=20)
+        self.client.post(user_login, self.user1_seller, format="json")
+
+        def names(query):
+            response = self.client.get(f"{product_list}?{query}", format="json")
+            self.assertEqual(response.status_code, 200)
+            return [product["name"] for product in response.json()["results"]]
+
+        self.assertEqual(names("cost_min=15&cost_max=30"), ["Apple", "Banana"])
+        self.assertEqual(names(f"user={seller_1.id}"), ["Apple", "Apricot"])
+        self.assertEqual(names("name=Ap"), ["Apple", "Apricot"])
+        self.assertEqual(names("in_stock=true"), ["Apricot", "Banana"])
+        self.assertEqual(names("ordering=-cost"), ["Apple", "Banana", "Apricot"])
+
+        response = self.client.get(
+            f"{product_list}?ordering=cost&page_size=2", format="json"
+        )
+        response = self.client.get(response.json()["next"], format="json")
+        self.assertEqual(
+            [product["name"] for product in response.json()["results"]], ["Apple"]
+        )
+
+        response = self.client.get(f"{product_list}?ordering=amount", format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_product_list_filter_query_plans(self):
+        """
+        Product list filters are answered from the purpose-built indexes.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        ordered = Product.objects.order_by("created_at", "id")
+        in_stock_plan = ordered.filter(amount__gt=0)[:50].explain()
+        seller_plan = ordered.filter(user_id=1)[:50].explain()
+        cost_plan = (
+            Product.objects.order_by("cost", "id").filter(cost__gte=10)[:50].explain()
+        )
+
+        self.assertIn("products_in_stock_idx", in_stock_plan)
+        self.assertIn("products_user_created_idx", seller_plan)
+        self.assertIn("products_cost_id_idx", cost_plan)
@@ -0,0 +1,130 @@
+"""
+Product read replica tests.
+"""
+# django
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# local api
+from apps.products.cache import get_catalog_cache
+from apps.products.models import Product
+from apps.users.models import User
+from common.db import update_returning
+from common.middleware import ReplicaRoutingMiddleware
+from common.routers import begin_routing, end_routing
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Test read replica routing of product reads.
+    """
+
+    def test_product_reads_routed_to_replica(self):
+        """
+        Safe requests read products from a replica until the client writes.
+        """
+        routed = []
+
+        def view(request):
+            routed.append(router.db_for_read(Product))
+            if request.method == "POST":
+                router.db_for_write(Product)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+        config = {**settings.READ_REPLICAS, "ALIASES": ["replica"]}
+        with self.settings(READ_REPLICAS=config):
+            middleware(factory.get("/"))
+            response = middleware(factory.post("/"))
+            request = factory.get("/")
+            request.COOKIES[config["COOKIE_NAME"]] = "1"
+            middleware(request)
+
+        self.assertEqual(routed, ["replica", "default", "default"])
+        self.assertEqual(
+            response.cookies[config["COOKIE_NAME"]]["max-age"], config["PIN_SECONDS"]
+        )
+        self.assertEqual(router.db_for_read(Product), "default")
+
+
+class ReplicaDatabaseTests(TransactionTestCase):
+    """
+    Test read replica routing against a second database connection.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # a mirror of the test database reached through its own connection
+        primary = connections["default"].settings_dict
+        connections.settings["replica"] = {
+            **primary,
+            "TEST": {**primary["TEST"], "MIRROR": "default"},
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        super().tearDownClass()
+
+    def test_reads_and_writes_use_their_connection(self):
+        """
+        Routed reads query the replica, writes and transactional reads the primary.
+        """
+        user = User.objects.create_user(
+            username="seller@email.com", password="test1234", role="SELLER"
+        )
+        Product.objects.create(user=user, name="P", amount=1, cost=5)
+        config = {**settings.READ_REPLICAS, "ALIASES": ["replica"]}
+
+        with self.settings(READ_REPLICAS=config), CaptureQueriesContext(
+            connections["default"]
+        ) as primary, CaptureQueriesContext(connections["replica"]) as replica:
+            token = begin_routing(True)
+            try:
+                self.assertEqual(Product.objects.count(), 1)
+                update_returning(Product.objects.filter(user=user), ("cost",), cost=6)
+                with transaction.atomic():
+                    self.assertEqual(Product.objects.get().cost, 6)
+            finally:
+                state = end_routing(token)
+
+        self.assertTrue(state.wrote)
+        self.assertEqual(len(replica.captured_queries), 1)
+        self.assertIn("COUNT(", replica.captured_queries[0]["sql"])
+        primary_sql = [query["sql"] for query in primary.captured_queries]
+        self.assertTrue(any(sql.startswith("UPDATE") for sql in primary_sql))
+        self.assertTrue(
+            any(sql.startswith("SELECT") and '"cost"' in sql for sql in primary_sql)
+        )
+
+    def test_cached_list_pages_read_the_primary(self):
+        """
+        Product list pages and validators stored in the catalog cache are never
+        read from a replica, which may not have the latest write yet.
+        """
+        user = User.objects.create_user(
+            username="seller@email.com", password="test1234", role="SELLER"
+        )
+        Product.objects.create(user=user, name="P", amount=1, cost=5)
+        self.client.force_login(user)
+        get_catalog_cache().clear()
+        config = {**settings.READ_REPLICAS, "ALIASES": ["replica"]}
+
+        with self.settings(READ_REPLICAS=config), CaptureQueriesContext(
+            connections["replica"]
+        ) as replica:
+            response = self.client.get(reverse("product-list"), format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+        self.assertFalse(
+            any('"products"' in query["sql"] for query in replica.captured_queries)
+        )
@@ -1,25 +1,26 @@
 """
 Product tests.
 """
+from asgiref.sync import async_to_sync
 # django
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 # rest framework
 from rest_framework.test import APITestCase
 
-from apps.products.models import Product
 # local api
+from apps.products.cache import get_catalog_cache
+from apps.products.models import Product
 from apps.users.models import User
+from common.authentication import get_user_cache
+from common.throttling import get_login_counters
 
 
-class ProductsManagementTests(APITestCase):
+class ProductTestCase(APITestCase):
     """
-    Test CRUD operations for users
-    ( GET {{apiUrl}}/api/product/list/ ) - List
-    ( POST {{apiUrl}}/api/product/create/ ) - Create
-    ( PUT {{apiUrl}}/api/product/<int:product_id>/ ) - Update
-    ( DELETE {{apiUrl}}/api/product/<int:product_id>/ ) - Delete
-    ( POST {{apiUrl}}/api/product/<int:product_id>/buy/ ) - Update
+    Shared fixtures of the product tests.
     """
 
     user1_seller = {
@@ -59,14 +60,41 @@ class ProductsManagementTests(APITestCase):
     }
 
     def setUp(self):
+        get_catalog_cache().clear()
+        get_user_cache().clear()
+        for counter in get_login_counters():
+            counter.clear()
         self.client.credentials(HTTP_AUTHORIZATION=getattr(settings, "TOKEN", ""))
         self.client.post(reverse("user-register"), self.user1_seller, format="json")
         self.client.post(reverse("user-register"), self.user2_seller, format="json")
         self.client.post(reverse("user-register"), self.user3_buyer, format="json")
 
+
     def tearDown(self):
         self.client.logout()
 
+
+    def async_get(self, path, **headers):
+        """
+        GET path through the ASGI handler with the async test client.
+        """
+
+        async def get():
+            return await self.async_client.get(path, **headers)
+
+        return async_to_sync(get)()
+
+
+class ProductsManagementTests(ProductTestCase):
+    """
+    Test CRUD operations for users
+    ( GET {{apiUrl}}/api/product/list/ ) - List
+    ( POST {{apiUrl}}/api/product/create/ ) - Create
+    ( PUT {{apiUrl}}/api/product/<int:product_id>/ ) - Update
+    ( DELETE {{apiUrl}}/api/product/<int:product_id>/ ) - Delete
+    ( POST {{apiUrl}}/api/product/bulk/ ) - Create, Update
+    """
+
     def test_product_list_success(self):
         """
         Product list success.
@@ -81,10 +109,10 @@ class ProductsManagementTests(APITestCase):
         response = self.client.get(product_list, format="json")
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(response.json()["results"]), 2)
 
-        product_1 = response.json()[0]
-        product_2 = response.json()[0]
+        product_1 = response.json()["results"][0]
+        product_2 = response.json()["results"][0]
         user = User.objects.get(username=self.user1_seller["username"])
 
         self.assertTrue(product_1["name"], self.product_1["name"])
@@ -191,6 +219,31 @@ class ProductsManagementTests(APITestCase):
 
         self.assertTrue(user.role, self.user1_seller["role"])
 
+    def test_product_update_single_product_lookup(self):
+        """
+        Product update fetches the product once for permissions and handler.
+        """
+        user_login = reverse("user-login")
+        product_create = reverse("product-create")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        product_update = reverse(
+            "product-update-delete", kwargs={"product_id": product_id}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(product_update, self.product_2, format="json")
+
+        product_selects = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and '"products"' in query["sql"]
+        ]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(product_selects), 1)
+
     def test_product_update_invalid_product_id(self):
         """
         Product update invalid product id.
@@ -362,6 +415,69 @@ class ProductsManagementTests(APITestCase):
             "You do not have permission to perform this action.",
         )
 
+    def test_product_bulk_create(self):
+        """
+        Product bulk create inserts valid items and reports invalid ones.
+        """
+        user_login = reverse("user-login")
+        product_bulk = reverse("product-bulk")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+
+        payload = [self.product_1, {"name": "Broken"}, self.product_2]
+        response = self.client.post(product_bulk, payload, format="json")
+        json_response = response.json()
+        user = User.objects.get(username=self.user1_seller["username"])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [product["name"] for product in json_response["results"]],
+            [self.product_1["name"], self.product_2["name"]],
+        )
+        self.assertTrue(all(product["id"] for product in json_response["results"]))
+        self.assertEqual(list(json_response["errors"]), ["1"])
+        self.assertEqual(Product.objects.filter(user=user).count(), 2)
+
+    def test_product_bulk_update(self):
+        """
+        Product bulk update only touches products owned by the seller.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+        product_bulk = reverse("product-bulk")
+
+        self.client.post(user_login, self.user2_seller, format="json")
+        self.client.post(product_create, self.product_2, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+
+        product_1_id = Product.objects.get(name=self.product_1["name"]).id
+        product_2_id = Product.objects.get(name=self.product_2["name"]).id
+        payload = [
+            {"id": product_1_id, "name": "Renamed", "amount": 1, "cost": 5},
+            {"id": product_2_id, "name": "Stolen", "amount": 1, "cost": 5},
+        ]
+        response = self.client.put(product_bulk, payload, format="json")
+        json_response = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json_response["results"][0]["name"], "Renamed")
+        self.assertEqual(json_response["errors"], {"1": ["Product not found"]})
+        self.assertEqual(Product.objects.get(id=product_1_id).cost, 5)
+        self.assertEqual(
+            Product.objects.get(id=product_2_id).name, self.product_2["name"]
+        )
+
+
+class ProductBuyTests(ProductTestCase):
+    """
+    Test buying products
+    ( POST {{apiUrl}}/api/product/<int:product_id>/buy/ ) - Update
+    ( POST {{apiUrl}}/api/product/checkout/ ) - Update
+    """
+
     def test_product_buy_success(self):
         """
         Product buy success.
@@ -389,13 +505,42 @@ class ProductsManagementTests(APITestCase):
         self.assertEqual(json_response["product"]["cost"], self.product_1["cost"])
         self.assertEqual(json_response["product"]["id"], product_id)
         self.assertEqual(
-            sum(json_response["change"]),
+            sum(
+                int(coin) * count for coin, count in json_response["change"].items()
+            ),
             self.user3_buyer["deposit"] - self.product_1["cost"],
         )
         self.assertEqual(
             json_response["spending"], self.product_1["cost"] * buy_payload["quantity"]
         )
 
+    def test_product_buy_legacy_change_list(self):
+        """
+        Product buy reports change as a coin list on request.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, {**self.product_1, "cost": 15}, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user3_buyer, format="json")
+
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        product_buy = reverse("product-buy", kwargs={"product_id": product_id})
+        response = self.client.post(product_buy, {"quantity": 1}, format="json")
+
+        self.assertEqual(
+            response.json()["response"]["change"], {"50": 1, "20": 1, "10": 1, "5": 1}
+        )
+
+        response = self.client.post(
+            f"{product_buy}?change_format=list", {"quantity": 1}, format="json"
+        )
+
+        self.assertEqual(response.json()["response"]["change"], [50, 20])
+
     def test_product_buy_invalid_payload(self):
         """
         Product buy invalid payload.
@@ -500,3 +645,169 @@ class ProductsManagementTests(APITestCase):
             json_response["message"][0],
             "Not enough deposit available. Please insert more coins.",
         )
+
+    def test_product_buy_low_deposit_keeps_stock(self):
+        """
+        Product buy low deposit rolls back the stock decrement.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+
+        buy_payload = {"quantity": 10}
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_2, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user3_buyer, format="json")
+
+        product_id = Product.objects.get(name=self.product_2["name"]).id
+        product_buy = reverse("product-buy", kwargs={"product_id": product_id})
+        response = self.client.post(product_buy, buy_payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            Product.objects.get(id=product_id).amount, self.product_2["amount"]
+        )
+        self.assertEqual(
+            User.objects.get(username=self.user3_buyer["username"]).deposit,
+            self.user3_buyer["deposit"],
+        )
+
+    def test_product_buy_sold_out(self):
+        """
+        Product buy cannot oversell the remaining stock.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, {**self.product_1, "amount": 2}, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user3_buyer, format="json")
+
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        product_buy = reverse("product-buy", kwargs={"product_id": product_id})
+        response = self.client.post(product_buy, {"quantity": 2}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"]["product"]["amount"], 0)
+
+        response = self.client.post(product_buy, {"quantity": 1}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["message"][0],
+            "The requested quantity exceeds the available quantity.",
+        )
+        self.assertEqual(Product.objects.get(id=product_id).amount, 0)
+        self.assertEqual(
+            User.objects.get(username=self.user3_buyer["username"]).deposit,
+            self.user3_buyer["deposit"] - 2 * self.product_1["cost"],
+        )
+
+    def test_product_checkout_success(self):
+        """
+        Product checkout buys several products in one request.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+        product_checkout = reverse("product-checkout")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+        self.client.post(product_create, self.product_2, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user3_buyer, format="json")
+
+        product_1_id = Product.objects.get(name=self.product_1["name"]).id
+        product_2_id = Product.objects.get(name=self.product_2["name"]).id
+        payload = {
+            "items": [
+                {"product_id": product_2_id, "quantity": 1},
+                {"product_id": product_1_id, "quantity": 2},
+                {"product_id": product_2_id, "quantity": 1},
+            ]
+        }
+        response = self.client.post(product_checkout, payload, format="json")
+        json_response = response.json()["response"]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json_response["spending"], 60)
+        self.assertEqual(json_response["change"], {"20": 2})
+        self.assertEqual(
+            [(product["id"], product["amount"]) for product in json_response["products"]],
+            [(product_1_id, 8), (product_2_id, 18)],
+        )
+        self.assertEqual(
+            User.objects.get(username=self.user3_buyer["username"]).deposit, 40
+        )
+
+    def test_product_checkout_rolls_back(self):
+        """
+        Product checkout leaves every product untouched if one item fails.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+        product_checkout = reverse("product-checkout")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+        self.client.post(product_create, self.product_2, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user3_buyer, format="json")
+
+        product_1_id = Product.objects.get(name=self.product_1["name"]).id
+        product_2_id = Product.objects.get(name=self.product_2["name"]).id
+        payload = {
+            "items": [
+                {"product_id": product_1_id, "quantity": 1},
+                {"product_id": product_2_id, "quantity": 50},
+            ]
+        }
+        response = self.client.post(product_checkout, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["message"][str(product_2_id)][0],
+            "The requested quantity exceeds the available quantity.",
+        )
+        self.assertEqual(
+            Product.objects.get(id=product_1_id).amount, self.product_1["amount"]
+        )
+        self.assertEqual(
+            User.objects.get(username=self.user3_buyer["username"]).deposit,
+            self.user3_buyer["deposit"],
+        )
+
+    def test_product_buy_idempotency_key(self):
+        """
+        Product buy retried with the same Idempotency-Key is applied once.
+        """
+        user_login = reverse("user-login")
+        user_logout = reverse("user-logout")
+        product_create = reverse("product-create")
+
+        self.client.post(user_login, self.user1_seller, format="json")
+        self.client.post(product_create, self.product_1, format="json")
+        self.client.post(user_logout, format="json")
+        self.client.post(user_login, self.user3_buyer, format="json")
+
+        product_id = Product.objects.get(name=self.product_1["name"]).id
+        product_buy = reverse("product-buy", kwargs={"product_id": product_id})
+        for _ in range(3):
+            response = self.client.post(
+                product_buy, {"quantity": 1}, format="json", HTTP_IDEMPOTENCY_KEY="k1"
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(
+            Product.objects.get(id=product_id).amount, self.product_1["amount"] - 1
+        )
+        self.assertEqual(
+            User.objects.get(username=self.user3_buyer["username"]).deposit,
+            self.user3_buyer["deposit"] - self.product_1["cost"],
+        )
@@ -7,7 +7,18 @@ from . import views
 
 urlpatterns = [
     path("list/", view=views.ProductListView.as_view(), name="product-list"),
+    path(
+        "list/async/",
+        view=views.AsyncProductListView.as_view(),
+        name="product-list-async",
+    ),
+    path("export/", view=views.ProductExportView.as_view(), name="product-export"),
+    path("changes/", view=views.ProductChangesView.as_view(), name="product-changes"),
     path("create/", view=views.ProductCreateView.as_view(), name="product-create"),
+    path("bulk/", view=views.ProductBulkView.as_view(), name="product-bulk"),
+    path(
+        "checkout/", view=views.ProductCheckoutView.as_view(), name="product-checkout"
+    ),
     path(
         "<int:product_id>/",
         view=views.ProductUpdateDeleteView.as_view(),
@@ -1,22 +1,248 @@
 """
 Product views.
 """
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import authentication, generics, permissions, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from common.conditional import make_etag, not_modified, set_validators
+from common.idempotency import idempotent
+from common.mixins import IdentityMapMixin
+from common.pagination import KeysetPagination
 from common.permissions import IsBuyer, IsOwner, IsSeller
+from common.views import AsyncAPIView
 
+from .cache import (
+    acache_response,
+    acatalog_validator,
+    acatalog_version,
+    aget_cached_response,
+    bump_catalog_version,
+    cache_response,
+    catalog_validator,
+    catalog_version,
+    get_cached_response,
+)
+from .events import publish_product_event
+from .filters import ProductFilterBackend
 from .models import Product
-from .serializers import ProductSerializer
-from .services import buy_product
+from .serializers import ProductReadSerializer, ProductSerializer, parse_fields
+from .services import buy_product, changes_since, checkout, expand_change
 
 
-class ProductListView(generics.ListAPIView):
+def requested_fields(request):
+    """
+    Return the field names requested with ``?fields=`` on safe requests.
+
+    ```
+    :return: tuple of field names, or None for all fields
+    ```
+    """
+    if request.method not in permissions.SAFE_METHODS:
+        return None
+    return parse_fields(request.query_params.get("fields"))
+
+
+class SparseFieldsMixin:
+    """
+    Restrict product reads to the fields requested with ``?fields=``.
+    """
+
+    def get_requested_fields(self):
+        """
+        Return the requested field names for safe requests, None for all.
+        """
+        return requested_fields(self.request)
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Return the serializer limited to the requested fields.
+        """
+        kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class ProductListView(SparseFieldsMixin, generics.ListAPIView):
     """
     List all products.
 
     * Requires session authentication.
+    * Paginated by ``(created_at, id)`` cursor, see ``?cursor=`` and ``?page_size=``.
+    * ``?fields=id,name`` limits both the output and the selected columns.
+    * Filtered by ``cost_min``, ``cost_max``, ``user``, ``name`` prefix and
+      ``in_stock``; ordered by ``?ordering=created_at|cost`` (``-`` for desc).
+    """
+
+    queryset = Product.objects.all()
+    model = Product
+    serializer_class = ProductSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [ProductFilterBackend]
+    ordering_fields = ("created_at", "cost")
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [authentication.SessionAuthentication]
+
+    def list(self, request, *args, **kwargs):
+        """
+        List products.
+
+        JSON pages are rendered once per catalog version and then served from
+        the catalog cache until the next product write. Responses carry an
+        ETag derived from the product table, so polling clients get 304 Not
+        Modified without any serialization. There is no Last-Modified: the
+        newest ``updated_at`` does not move when a product is deleted.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 200
+        ```
+        """
+        count, last_modified = catalog_validator()
+        etag = make_etag(
+            count,
+            last_modified,
+            request.accepted_media_type,
+            request.build_absolute_uri(),
+        )
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if request.accepted_renderer.format != "json":
+            response = super().list(request, *args, **kwargs)
+            return set_validators(response, etag)
+
+        # pages are only reused while the validator they were built under is
+        # current, the version alone may be per process
+        content = get_cached_response(etag)
+
+        if content is None:
+            version = catalog_version()
+            content = request.accepted_renderer.render(
+                self.get_page_data(request),
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            cache_response(etag, content, version)
+
+        response = HttpResponse(content, content_type=request.accepted_media_type)
+        return set_validators(response, etag)
+
+    def get_page_data(self, request):
+        """
+        Build one page of products through the read only fast path.
+
+        The page is cached for everyone, so it is read from the primary.
+        """
+        reader = ProductReadSerializer(self.get_requested_fields())
+        queryset = self.filter_queryset(self.get_queryset().using(DEFAULT_DB_ALIAS))
+        rows = self.paginator.paginate_values(queryset, reader.fields, request, self)
+        return self.paginator.get_paginated_response(
+            reader.to_representation(rows)
+        ).data
+
+
+class AsyncProductListView(AsyncAPIView):
+    """
+    List all products on the async request path.
+
+    * Requires session authentication.
+    * Same JSON pages, query parameters, catalog cache and validators as
+      ``ProductListView``, without leaving the event loop under ASGI.
+    """
+
+    ordering_fields = ProductListView.ordering_fields
+
+    async def get(self, request, *args, **kwargs):
+        """
+        List products.
+
+        ```
+        :param HttpRequest request: client request with session cookie
+        :return: Response with status 200, or 304 if the client copy is current
+        ```
+        """
+        media_type = self.renderer.media_type
+        count, last_modified = await acatalog_validator()
+        etag = make_etag(count, last_modified, media_type, request.build_absolute_uri())
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        content = await aget_cached_response(etag)
+
+        if content is None:
+            version = await acatalog_version()
+            content = self.renderer.render(await self.get_page_data(request))
+            await acache_response(etag, content, version)
+
+        response = HttpResponse(content, content_type=media_type)
+        return set_validators(response, etag)
+
+    async def get_page_data(self, request):
+        """
+        Build one page of products through the read only fast path.
+
+        The page is cached for everyone, so it is read from the primary.
+        """
+        reader = ProductReadSerializer(parse_fields(request.query_params.get("fields")))
+        paginator = KeysetPagination()
+        queryset = ProductFilterBackend().filter_queryset(
+            request, Product.objects.using(DEFAULT_DB_ALIAS), self
+        )
+        rows = await paginator.apaginate_values(queryset, reader.fields, request, self)
+        return paginator.get_paginated_response(reader.to_representation(rows)).data
+
+
+class ProductExportView(generics.GenericAPIView):
+    """
+    Export the whole product catalog.
+
+    * Requires session authentication.
+    * Streams a JSON array, or NDJSON with ``?output=ndjson``.
+    """
+
+    queryset = Product.objects.all()
+    model = Product
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [authentication.SessionAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Stream products.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Streaming response with status 200
+        ```
+        """
+        ndjson = request.query_params.get("output") == "ndjson"
+        chunks = ProductReadSerializer().stream(
+            self.get_queryset().order_by("id"),
+            chunk_size=getattr(settings, "PRODUCT_EXPORT_CHUNK_SIZE", 2000),
+            ndjson=ndjson,
+        )
+        return StreamingHttpResponse(
+            chunks,
+            content_type="application/x-ndjson" if ndjson else "application/json",
+        )
+
+
+class ProductChangesView(generics.GenericAPIView):
+    """
+    List products changed since a sync token.
+
+    * Requires session authentication.
+    * Returns products created or updated and ids of deleted products since
+      ``?since=<token>``; pass back ``next`` until ``has_more`` is false.
+    * Tokens older than ``PRODUCT_TOMBSTONE_RETENTION`` get 410 Gone, the
+      client then starts over without ``since``.
+    * Changes of the last ``PRODUCT_CHANGES_LAG`` seconds are reported again
+      on the next call, so writes that commit late are not missed.
     """
 
     queryset = Product.objects.all()
@@ -25,6 +251,23 @@ class ProductListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     authentication_classes = [authentication.SessionAuthentication]
 
+    def get(self, request, *args, **kwargs):
+        """
+        List changes.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 200
+        :raise: SyncTokenExpired if the token is past the retention window
+        :raise: ValidationError if the token is malformed
+        ```
+        """
+        paginator = KeysetPagination()
+        changes = changes_since(
+            request.query_params.get("since"), paginator.get_page_size(request)
+        )
+        return Response(changes, status=status.HTTP_200_OK)
+
 
 class ProductCreateView(generics.CreateAPIView):
     """
@@ -44,13 +287,15 @@ class ProductCreateView(generics.CreateAPIView):
         Perform create product.
         """
         serializer.save(user=self.request.user)
+        bump_catalog_version()
 
 
-class ProductUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
+class ProductUpdateDeleteView(IdentityMapMixin, generics.GenericAPIView):
     """
     Update and Delete products.
 
     * Requires session authentication.
+    * ``?fields=id,name`` limits both the output and the selected columns of reads.
     """
 
     queryset = Product.objects.all()
@@ -59,7 +304,7 @@ class ProductUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, IsSeller, IsOwner]
     authentication_classes = [authentication.SessionAuthentication]
 
-    def get_object(self):
+    def load_object(self):
         """
         Retrieve product.
 
@@ -67,13 +312,37 @@ class ProductUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         :raise: ValidationError if product not found or is invalid
         ```
         """
+        queryset = Product.objects.all()
+        fields = requested_fields(self.request)
+        if fields:
+            queryset = queryset.only(*fields, "user", "updated_at")
+
         try:
-            product = Product.objects.get(id=self.kwargs.get("product_id"))
+            product = queryset.get(id=self.kwargs.get("product_id"))
         except:
             raise ValidationError("Product not found")
         return product
 
-    def update(self, request, *args, **kwargs):
+    def get(self, request, *args, **kwargs):
+        """
+        Retrieve product.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 200, or 304 if the client copy is current
+        ```
+        """
+        product = self.get_object()
+        fields = requested_fields(request)
+        etag = make_etag(
+            product.pk, product.updated_at, request.accepted_media_type, fields
+        )
+        response = not_modified(request, etag, product.updated_at)
+        if response is None:
+            response = Response(self.get_serializer(product, fields=fields).data)
+        return set_validators(response, etag, product.updated_at)
+
+    def put(self, request, *args, **kwargs):
         """
         Update product.
 
@@ -86,9 +355,17 @@ class ProductUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         serializer = self.get_serializer(product, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        bump_catalog_version()
+        publish_product_event("product", product)
         return Response(serializer.data)
 
-    def destroy(self, request, *args, **kwargs):
+    def patch(self, request, *args, **kwargs):
+        """
+        Update product, the same as ``put``.
+        """
+        return self.put(request, *args, **kwargs)
+
+    def delete(self, request, *args, **kwargs):
         """
         Delete product.
 
@@ -97,7 +374,10 @@ class ProductUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         ```
         """
         product = self.get_object()
+        product_id = product.pk
         product.delete()
+        bump_catalog_version()
+        publish_product_event("delete", product_id)
         return Response(
             {"message": "Product deleted successfully"},
             status=status.HTTP_204_NO_CONTENT,
@@ -109,6 +389,9 @@ class ProductBuyView(generics.GenericAPIView):
     Buy products.
 
     * Requires session authentication.
+    * Change is reported as ``{coin: count}``; ``?change_format=list`` returns
+      the legacy list with one element per coin.
+    * Retries carrying the same ``Idempotency-Key`` header replay the response.
     """
 
     queryset = Product.objects.all()
@@ -117,6 +400,7 @@ class ProductBuyView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated, IsBuyer]
     authentication_classes = [authentication.SessionAuthentication]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         """
         Buy product.
@@ -135,14 +419,149 @@ class ProductBuyView(generics.GenericAPIView):
         else:
             raise ValidationError("No product provided")
 
-        change_list, spending, product = buy_product(request.user, request.data)
+        change, spending, product = buy_product(request.user, request.data)
 
         if product:
+            if request.query_params.get("change_format") == "list":
+                change = expand_change(change)
+
             report = {
-                "change": change_list,
+                "change": change,
                 "spending": spending,
                 "product": ProductSerializer(product).data,
             }
 
             return Response({"response": report}, status=status.HTTP_200_OK)
         raise ValidationError("Product not found")
+
+
+class ProductCheckoutView(generics.GenericAPIView):
+    """
+    Buy several products in one request.
+
+    * Requires session authentication.
+    * Accepts ``{"items": [{"product_id": <id>, "quantity": <n>}, ...]}``.
+    * Retries carrying the same ``Idempotency-Key`` header replay the response.
+    """
+
+    queryset = Product.objects.all()
+    model = Product
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAuthenticated, IsBuyer]
+    authentication_classes = [authentication.SessionAuthentication]
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        """
+        Checkout cart.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 200
+        :raise: ValidationError if any product is not found or is invalid
+        ```
+        """
+        if not request.data:
+            raise ValidationError("Invalid payload")
+
+        change, spending, products = checkout(request.user, request.data)
+
+        if request.query_params.get("change_format") == "list":
+            change = expand_change(change)
+
+        report = {
+            "change": change,
+            "spending": spending,
+            "products": ProductSerializer(products, many=True).data,
+        }
+
+        return Response({"response": report}, status=status.HTTP_200_OK)
+
+
+class ProductBulkView(generics.GenericAPIView):
+    """
+    Create and update products in bulk.
+
+    * Requires session authentication.
+    * Accepts a list of products; updates also need the ``id`` of each product.
+    * Invalid items are reported by index and do not abort the batch.
+    """
+
+    queryset = Product.objects.all()
+    model = Product
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSeller]
+    authentication_classes = [authentication.SessionAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Create products.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 201
+        :raise: ValidationError if no product is valid
+        ```
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        valid, errors = serializer.validate_items()
+
+        products = []
+        if valid:
+            products = serializer.create(
+                [{**data, "user": request.user} for _, _, data in valid]
+            )
+            bump_catalog_version()
+
+        return self.bulk_response(products, errors, status.HTTP_201_CREATED)
+
+    def put(self, request, *args, **kwargs):
+        """
+        Update products owned by the user.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 200
+        :raise: ValidationError if no product is valid
+        ```
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        valid, errors = serializer.validate_items()
+
+        ids = [item.get("id") for _, item, _ in valid]
+        owned = Product.objects.filter(
+            id__in=[pk for pk in ids if isinstance(pk, int)], user=request.user
+        ).in_bulk()
+
+        products, data = [], []
+        for index, item, attrs in valid:
+            product = owned.get(item.get("id"))
+            if product is None:
+                errors[index] = ["Product not found"]
+                continue
+            products.append(product)
+            data.append(attrs)
+
+        if products:
+            serializer.update(products, data)
+            bump_catalog_version()
+
+        return self.bulk_response(
+            products, dict(sorted(errors.items())), status.HTTP_200_OK
+        )
+
+    @staticmethod
+    def bulk_response(products, errors, success_status):
+        """
+        Report written products and per item errors.
+        """
+        if errors and not products:
+            raise ValidationError({"errors": errors})
+
+        return Response(
+            {
+                "results": ProductSerializer(products, many=True).data,
+                "errors": errors,
+            },
+            status=success_status,
+        )
@@ -11,3 +11,10 @@ class UsersConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
+
+    def ready(self):
+        """
+        Register user signal handlers.
+        """
+        # pylint: disable=import-outside-toplevel,unused-import
+        from . import signals
@@ -0,0 +1,42 @@
+"""
+Provision users from a CSV file.
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.users.serializers import RegisterSerializer
+
+
+class Command(BaseCommand):
+    """
+    Create users in bulk, hashing passwords across every core.
+    """
+
+    help = (
+        "Create users from a CSV file with a username,password[,role,deposit] "
+        "header."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+
+    def handle(self, *args, **options):
+        with open(options["path"], newline="", encoding="utf-8") as csv_file:
+            rows = [
+                {key: value for key, value in row.items() if value not in (None, "")}
+                for row in csv.DictReader(csv_file)
+            ]
+
+        serializer = RegisterSerializer(data=rows, many=True)
+        try:
+            valid, errors = serializer.validate_items()
+            users = serializer.create([data for _, _, data in valid]) if valid else []
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        for index, error in errors.items():
+            # header is line 1
+            self.stderr.write(f"Line {index + 2}: {error}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(users)} users"))
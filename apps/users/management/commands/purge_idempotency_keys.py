@@ -0,0 +1,18 @@
+"""
+Delete expired idempotency keys.
+"""
+from django.core.management.base import BaseCommand
+
+from common.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    """
+    Purge idempotency keys past their TTL.
+    """
+
+    help = "Delete expired idempotency keys."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired keys"))
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.1 on 2026-10-16 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedSession",
+            fields=[
+                (
+                    "token_id",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("revoked_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "Revoked session",
+                "verbose_name_plural": "Revoked sessions",
+                "db_table": "revoked_sessions",
+            },
+        ),
+    ]
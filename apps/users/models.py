@@ -1,9 +1,12 @@
 """
 User models.
 """
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
 from django.db import models
+from django.utils.crypto import salted_hmac
 
 
 class UserManager(BaseUserManager):
@@ -30,6 +33,35 @@ class UserManager(BaseUserManager):
 
         return user
 
+    async def acreate_user(
+        self, username, password=None, role=None, deposit=None, **extra_fields
+    ):
+        """
+        Async ``create_user`` hashing the password in the hasher pool.
+        """
+        # pylint: disable=import-outside-toplevel
+        from common.hashing import amake_password
+
+        if username is None:
+            raise TypeError("Users should have a username")
+
+        role = "BUYER" if role is None else role
+        deposit = 0 if deposit is None else deposit
+
+        user = self.model(
+            username=self.normalize_email(username),
+            role=role,
+            deposit=deposit,
+            **extra_fields,
+        )
+        if password is None:
+            user.set_unusable_password()
+        else:
+            user.password = await amake_password(password)
+        await sync_to_async(user.save)(using=self._db)
+
+        return user
+
     def create_superuser(
         self, username, password=None, role=None, deposit=None, **extra_fields
     ):
@@ -104,6 +136,21 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         return f"{self.username}: {self.role}"
 
+    def get_session_auth_hash(self):
+        """
+        Session fingerprint, also bound to the role with signed sessions.
+
+        Signed sessions are not stored server side, so a role change ends
+        them through this hash; database sessions keep Django's hash.
+        """
+        if settings.SESSION_ENGINE != "apps.users.sessions":
+            return super().get_session_auth_hash()
+        return salted_hmac(
+            "django.contrib.auth.models.AbstractBaseUser.get_session_auth_hash",
+            f"{self.password}:{self.role}",
+            algorithm="sha256",
+        ).hexdigest()
+
     class Meta:
         """
         Meta class.
@@ -112,3 +159,51 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = "user"
         verbose_name = "User"
         verbose_name_plural = "Users"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency key database model.
+    Used for storing the response of a request so that retries replay it.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    body = models.BinaryField(null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        """
+        Meta class.
+        """
+
+        db_table = "idempotency_keys"
+        verbose_name = "Idempotency key"
+        verbose_name_plural = "Idempotency keys"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="idempotency_keys_user_key_uniq"
+            ),
+        ]
+
+
+class RevokedSession(models.Model):
+    """
+    Revoked session database model.
+    Used for denying signed session tokens until they would have expired.
+    """
+
+    token_id = models.CharField(max_length=32, primary_key=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        """
+        Meta class.
+        """
+
+        db_table = "revoked_sessions"
+        verbose_name = "Revoked session"
+        verbose_name_plural = "Revoked sessions"
@@ -1,12 +1,110 @@
 """
 User serializer.
 """
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from common.hashing import make_passwords
+from common.metrics import TimedDataMixin
 
 from .models import User
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+def _bulk_config():
+    return getattr(settings, "USER_BULK", {})
+
+
+# users are only created in bulk, the abstract update() is never called
+class RegisterBulkSerializer(  # pylint: disable=abstract-method
+    TimedDataMixin, serializers.ListSerializer
+):
+    """
+    User list serializer provisioning users with bulk queries.
+
+    Usernames are checked for duplicates with one query for the whole batch
+    and passwords are hashed in parallel in the hasher pool.
+    """
+
+    def validate_items(self):
+        """
+        Validate every item of the initial data.
+
+        ```
+        :return: (valid, errors) where valid is a list of (index, item, data)
+        :raise: ValidationError if the payload is not a list or is too long
+        ```
+        """
+        if not isinstance(self.initial_data, list):
+            raise serializers.ValidationError("Expected a list of users.")
+        if len(self.initial_data) > _bulk_config().get("MAX_ITEMS", 10000):
+            raise serializers.ValidationError("Too many users in one request.")
+
+        # usernames are checked for the whole batch below, so validate items
+        # with a copy of the child that skips the per-item unique query
+        child = type(self.child)(context=self.context)
+        username = child.fields["username"]
+        username.validators = [
+            validator
+            for validator in username.validators
+            if not isinstance(validator, UniqueValidator)
+        ]
+
+        candidates, errors = [], {}
+        for index, item in enumerate(self.initial_data):
+            try:
+                data = child.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+                continue
+            data["username"] = User.objects.normalize_email(data["username"])
+            candidates.append((index, item, data))
+
+        taken = set(
+            User.objects.filter(
+                username__in=[data["username"] for _, _, data in candidates]
+            ).values_list("username", flat=True)
+        )
+        valid = []
+        for index, item, data in candidates:
+            if data["username"] in taken:
+                errors[index] = {
+                    "username": ["user with this username already exists."]
+                }
+                continue
+            taken.add(data["username"])
+            valid.append((index, item, data))
+        return valid, dict(sorted(errors.items()))
+
+    def create(self, validated_data):
+        """
+        Insert users in chunks of ``USER_BULK["CHUNK_SIZE"]`` rows.
+
+        ```
+        :raise: ValidationError if a username was registered meanwhile
+        ```
+        """
+        passwords = make_passwords([attrs["password"] for attrs in validated_data])
+        users = [
+            User(
+                username=attrs["username"],
+                password=password,
+                role=attrs.get("role") or "BUYER",
+                deposit=attrs.get("deposit") or 0,
+            )
+            for attrs, password in zip(validated_data, passwords)
+        ]
+        try:
+            with transaction.atomic():
+                return User.objects.bulk_create(
+                    users, batch_size=_bulk_config().get("CHUNK_SIZE", 1000)
+                )
+        except IntegrityError:
+            raise serializers.ValidationError("Error while saving the users")
+
+
+class RegisterSerializer(TimedDataMixin, serializers.ModelSerializer):
     """
     User serializer.
     """
@@ -19,11 +117,10 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ("username", "password", "role", "deposit")
         extra_kwargs = {"password": {"write_only": True}}
+        list_serializer_class = RegisterBulkSerializer
 
     def create(self, validated_data):
         """
         Create a new user with encrypted password and return it.
         """
-        user = User.objects.create_user(**validated_data)
-        user.save()
-        return user
+        return User.objects.create_user(**validated_data)
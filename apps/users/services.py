@@ -1,9 +1,40 @@
 """
 User services.
 """
+from django.db import DatabaseError
+from django.db.models import F, Value
 from rest_framework.exceptions import ValidationError
 
+from common.db import update_returning
+
 from .models import User
+from .signals import user_updated
+
+COIN_DENOMINATIONS = (100, 50, 20, 10, 5)
+MAX_COINS_PER_DEPOSIT = 100
+
+
+def _update_deposit(user, expression):
+    """
+    Apply expression to the user's deposit column only
+
+    :param User user: User instance
+    :param Expression expression: New deposit value
+    :return: The new deposit
+    """
+    try:
+        users = update_returning(
+            User.objects.filter(pk=user.pk), ("id", "deposit"), deposit=expression
+        )
+    except DatabaseError:
+        raise ValidationError("Error while saving the user")
+
+    if not users:
+        raise ValidationError("Invalid input")
+
+    user.deposit = users[0].deposit
+    user_updated.send(sender=User, instance=user)
+    return user.deposit
 
 
 def deposit_amount(user=None, amount=None):
@@ -12,21 +43,37 @@ def deposit_amount(user=None, amount=None):
 
     :param User user: User instance
     :param int amount: Amount to deposit
+    :return: The new deposit
     """
     if (
         amount is None
         or not isinstance(amount, int)
-        or amount not in [100, 50, 20, 10, 5]
+        or amount not in COIN_DENOMINATIONS
     ):
         raise ValidationError("Invalid input")
 
-    user.deposit += amount
-    try:
-        user.save()
-    except Exception:
-        raise ValidationError("Error while saving the user")
+    return _update_deposit(user, F("deposit") + amount)
 
-    return True
+
+def deposit_coins(user=None, coins=None):
+    """
+    Deposit several coins to user's deposit in one update
+
+    :param User user: User instance
+    :param list coins: Coins to deposit
+    :return: The new deposit
+    """
+    if (
+        not isinstance(coins, list)
+        or not 0 < len(coins) <= MAX_COINS_PER_DEPOSIT
+        or any(
+            not isinstance(coin, int) or coin not in COIN_DENOMINATIONS
+            for coin in coins
+        )
+    ):
+        raise ValidationError("Invalid input")
+
+    return _update_deposit(user, F("deposit") + sum(coins))
 
 
 def reset_amount(user=None):
@@ -34,14 +81,9 @@ def reset_amount(user=None):
     Reset user's deposit
 
     :param User user: User instance
+    :return: The new deposit
     """
     if user is None or not isinstance(user, User):
         raise ValidationError("Invalid input")
 
-    user.deposit = 0
-    try:
-        user.save()
-    except Exception:
-        raise ValidationError("Error while saving the user")
-
-    return True
+    return _update_deposit(user, Value(0))
@@ -0,0 +1,170 @@
+"""
+User signed session engine.
+
+Enable with ``SESSION_ENGINE = "apps.users.sessions"``. The session lives in
+a signed cookie carrying the user id and the password/role fingerprint that
+``get_user`` checks, so loading it reads no session table. Logged out tokens
+are denied through ``RevokedSession`` rows, checked against an in-process
+snapshot that is refreshed at most every ``STATELESS_SESSIONS["REFRESH"]``
+seconds.
+"""
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends import signed_cookies
+from django.utils import timezone
+
+from .models import RevokedSession
+
+TOKEN_ID_KEY = "_token_id"
+
+
+class SessionDenylist:
+    """
+    In-process snapshot of the revoked session tokens.
+    """
+
+    def __init__(self, refresh=5):
+        self.refresh = refresh
+        self._revoked = {}
+        self._loaded_at = None
+        self._checked = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, token_id):
+        """
+        Return whether token_id was revoked and has not expired yet.
+        """
+        self._refresh()
+        expires = self._revoked.get(token_id)
+        return expires is not None and expires > time.time()
+
+    def revoke(self, token_id, expires_at):
+        """
+        Deny token_id until expires_at in every process.
+        """
+        RevokedSession.objects.bulk_create(
+            [RevokedSession(token_id=token_id, expires_at=expires_at)],
+            ignore_conflicts=True,
+        )
+        with self._lock:
+            self._revoked[token_id] = expires_at.timestamp()
+
+    def clear(self):
+        """
+        Forget the snapshot, the next check reloads it.
+        """
+        with self._lock:
+            self._revoked = {}
+            self._loaded_at = self._checked = None
+
+    def _refresh(self):
+        """
+        Reload the snapshot once it is older than ``refresh`` seconds.
+
+        The first load reads every live row, later ones only the rows revoked
+        since the previous load; expired tokens are dropped on the way.
+        """
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.refresh:
+            return
+        with self._lock:
+            if self._checked is not None and now - self._checked < self.refresh:
+                return
+            started = timezone.now()
+            rows = RevokedSession.objects.filter(expires_at__gt=started)
+            if self._loaded_at is not None:
+                # rows revoked by other processes since the last refresh, with
+                # slack for clock skew between servers
+                rows = rows.filter(
+                    revoked_at__gte=self._loaded_at - timedelta(seconds=self.refresh)
+                )
+            revoked = {
+                token_id: expires_at.timestamp()
+                for token_id, expires_at in rows.values_list("token_id", "expires_at")
+            }
+            cutoff = time.time()
+            self._revoked = {
+                token_id: expires
+                for token_id, expires in self._revoked.items()
+                if expires > cutoff
+            }
+            self._revoked.update(revoked)
+            self._loaded_at = started
+            self._checked = now
+
+
+_denylist = None
+
+
+def get_session_denylist():
+    """
+    Return the process wide session denylist.
+    """
+    global _denylist  # pylint: disable=global-statement
+    if _denylist is None:
+        config = getattr(settings, "STATELESS_SESSIONS", {})
+        _denylist = SessionDenylist(refresh=config.get("REFRESH", 5))
+    return _denylist
+
+
+class SessionStore(signed_cookies.SessionStore):
+    """
+    Signed cookie session whose tokens can be revoked server side.
+
+    * Every saved session gets a random token id; logging in issues a new one.
+    * ``flush()`` on logout denies the token id until the cookie would have
+      expired anyway.
+    """
+
+    def load(self):
+        """
+        Return the cookie data, or a new empty session if its token was revoked.
+        """
+        data = super().load()
+        token_id = data.get(TOKEN_ID_KEY)
+        if token_id and get_session_denylist().is_revoked(token_id):
+            self.create()
+            return {}
+        return data
+
+    def save(self, must_create=False):
+        """
+        Sign the session into the cookie, issuing a token id on first save.
+        """
+        if TOKEN_ID_KEY not in self._session:
+            self._session[TOKEN_ID_KEY] = secrets.token_hex(12)
+        super().save(must_create)
+
+    def cycle_key(self):
+        """
+        Revoke the current token and issue a new one, as on login.
+        """
+        self.revoke()
+        self._session.pop(TOKEN_ID_KEY, None)
+        super().cycle_key()
+
+    def flush(self):
+        """
+        Revoke the current token and empty the session, as on logout.
+        """
+        self.revoke()
+        super().flush()
+
+    def revoke(self):
+        """
+        Deny the token of this session in every process.
+        """
+        token_id = self._session.get(TOKEN_ID_KEY)
+        if token_id:
+            expires_at = timezone.now() + timedelta(
+                seconds=self.get_session_cookie_age()
+            )
+            get_session_denylist().revoke(token_id, expires_at)
+
+    @classmethod
+    def clear_expired(cls):
+        RevokedSession.objects.filter(expires_at__lte=timezone.now()).delete()
@@ -0,0 +1,23 @@
+"""
+User signals.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from common.authentication import invalidate_credentials, invalidate_user
+
+from .models import User
+
+# Sent with ``instance`` after a queryset update that bypasses ``User.save()``.
+user_updated = Signal()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(user_updated)
+def invalidate_user_caches(sender, instance, **kwargs):
+    """
+    Drop cached state for a user whose row changed.
+    """
+    invalidate_credentials(instance.get_username())
+    invalidate_user(instance.pk)
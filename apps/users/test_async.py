@@ -0,0 +1,72 @@
+"""
+User async view tests.
+"""
+# django
+from django.conf import settings
+from django.urls import reverse
+
+# local api
+from apps.users.models import User
+from apps.users.tests import UserTestCase
+
+
+class UserAsyncTests(UserTestCase):
+    """
+    Test the async user views.
+    """
+
+    def test_user_register_login_async(self):
+        """
+        User register and login on the async path hash in the worker pool.
+        """
+        response = self.async_post(reverse("user-register-async"), self.mock_data)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["username"], self.mock_data["username"])
+        user = User.objects.get(username=self.mock_data["username"])
+        self.assertTrue(user.check_password(self.mock_data["password"]))
+
+        url_login = reverse("user-login-async")
+        response = self.async_post(url_login, {**self.mock_data, "password": "wrong"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"][0], "Invalid Credentials")
+
+        response = self.async_post(url_login, self.mock_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["success"], f"Welcome {user.username}: {user.role}"
+        )
+
+        response = self.async_get(reverse("user-status-async"))
+        self.assertEqual(response.status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer scrape")
+        with self.settings(METRICS={**settings.METRICS, "TOKEN": "scrape"}):
+            metrics = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn("password_hash_queue_seconds_count", metrics)
+
+    def test_user_status_async(self):
+        """
+        User status on the async path matches the sync view.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_status = reverse("user-status-async")
+
+        response = self.async_get(url_status)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(
+            response.json()["error"]["message"],
+            "Authentication credentials were not provided.",
+        )
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+        self.async_client.cookies = self.client.cookies
+        response = self.async_get(url_status)
+
+        user = User.objects.filter(username=self.mock_data["username"]).get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["success"], f"Logged in as: {user.username} : {user.role}"
+        )
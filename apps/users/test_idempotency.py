@@ -0,0 +1,134 @@
+"""
+User idempotency key tests.
+"""
+from unittest import mock
+
+# django
+from django.db import DatabaseError
+from django.urls import reverse
+
+# local api
+from apps.users import views
+from apps.users.models import IdempotencyKey, User
+from apps.users.tests import UserTestCase
+
+
+class UserIdempotencyTests(UserTestCase):
+    """
+    Test deposits retried with an Idempotency-Key.
+    """
+
+    def test_user_deposit_idempotency_key(self):
+        """
+        User deposit retried with the same Idempotency-Key is applied once.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_deposit = reverse("user-deposit")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+
+        deposit_data = {"amount": 100}
+        first = self.client.post(
+            url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        second = self.client.post(
+            url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        user = User.objects.filter(username=self.mock_data["username"]).get()
+
+        self.assertEqual(user.deposit, 100)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+
+        response = self.client.post(
+            url_deposit, {"amount": 50}, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["message"][0],
+            "Idempotency-Key was already used for a different request",
+        )
+
+    def test_user_deposit_idempotency_key_in_progress(self):
+        """
+        User deposit duplicate sent while the first one still runs gets a 409.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_deposit = reverse("user-deposit")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+
+        deposit_data = {"amount": 100}
+        duplicates = []
+        deposit_amount = views.deposit_amount
+
+        def deposit_with_duplicate(user, amount):
+            duplicates.append(
+                self.client.post(
+                    url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+                )
+            )
+            return deposit_amount(user, amount)
+
+        with mock.patch.object(views, "deposit_amount", deposit_with_duplicate):
+            first = self.client.post(
+                url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+            )
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(duplicates[0].status_code, 409)
+        self.assertEqual(
+            duplicates[0].json()["error"]["message"],
+            "A request with this Idempotency-Key is in progress.",
+        )
+        self.assertEqual(
+            User.objects.get(username=self.mock_data["username"]).deposit, 100
+        )
+
+        retry = self.client.post(
+            url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(retry.json(), first.json())
+
+    def test_user_deposit_idempotency_key_store_failure(self):
+        """
+        User deposit whose response cannot be stored is rolled back for the retry.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_deposit = reverse("user-deposit")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+
+        deposit_data = {"amount": 100}
+        save = IdempotencyKey.save
+
+        def failing_save(record, *args, **kwargs):
+            if record.status_code is not None:
+                raise DatabaseError("lost connection")
+            return save(record, *args, **kwargs)
+
+        with mock.patch.object(
+            IdempotencyKey, "save", autospec=True, side_effect=failing_save
+        ), self.assertRaises(DatabaseError):
+            self.client.post(
+                url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+            )
+        self.assertEqual(
+            User.objects.get(username=self.mock_data["username"]).deposit, 0
+        )
+
+        retry = self.client.post(
+            url_deposit, deposit_data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(
+            User.objects.get(username=self.mock_data["username"]).deposit, 100
+        )
@@ -0,0 +1,160 @@
+"""
+User session and authentication cache tests.
+"""
+import base64
+
+# django
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.test import override_settings
+from django.urls import reverse
+
+# local api
+from apps.users.models import User
+from apps.users.sessions import get_session_denylist
+from apps.users.tests import UserTestCase
+from common.authentication import get_user_cache
+
+
+class UserSessionTests(UserTestCase):
+    """
+    Test cached credentials, session users and signed sessions.
+    """
+
+    def test_user_basic_auth_cached_credentials(self):
+        """
+        User basic authentication skips hashing and queries once verified.
+        """
+        url_register = reverse("user-register")
+        url_status = reverse("user-status")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        credentials = base64.b64encode(
+            f"{self.mock_data['username']}:{self.mock_data['password']}".encode()
+        ).decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+
+        response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url_status, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["success"],
+            f"Logged in as: {self.mock_data['username']} : BUYER",
+        )
+
+    def test_user_basic_auth_cache_invalidated(self):
+        """
+        User basic authentication cache is dropped when the password changes.
+        """
+        url_register = reverse("user-register")
+        url_status = reverse("user-status")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        credentials = base64.b64encode(
+            f"{self.mock_data['username']}:{self.mock_data['password']}".encode()
+        ).decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+
+        response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        user = User.objects.get(username=self.mock_data["username"])
+        user.set_password("changed1234")
+        user.save()
+
+        response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            response.json()["error"]["message"], "Invalid username/password."
+        )
+
+    def test_user_session_cached_user(self):
+        """
+        User session requests load the user row once until it changes.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_status = reverse("user-status")
+        url_deposit = reverse("user-deposit")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+        self.client.get(url_status, format="json")
+
+        # only the session row is read
+        with self.assertNumQueries(1):
+            response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.client.post(url_deposit, {"amount": 100}, format="json")
+        with self.assertNumQueries(2):
+            self.client.get(url_status, format="json")
+
+        # a save only drops the cached row, even if it is rolled back
+        user = User.objects.get(username=self.mock_data["username"])
+        try:
+            with transaction.atomic():
+                user.role = "SELLER"
+                user.save()
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assertIsNone(get_user_cache().get(user.pk))
+        with self.assertNumQueries(2):
+            response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("BUYER", response.json()["success"])
+
+        User.objects.filter(username=self.mock_data["username"]).delete()
+        response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SESSION_ENGINE="apps.users.sessions")
+    def test_user_session_ends_on_role_change(self):
+        """
+        User signed sessions are bound to the password and role they were
+        opened with.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_status = reverse("user-status")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+
+        user = User.objects.get(username=self.mock_data["username"])
+        user.role = "SELLER"
+        user.save()
+
+        response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SESSION_ENGINE="apps.users.sessions")
+    def test_user_signed_session(self):
+        """
+        User signed sessions cost no query and are denied after logout.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_status = reverse("user-status")
+        url_logout = reverse("user-logout")
+        get_session_denylist().clear()
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+        self.client.get(url_status, format="json")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        token = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.client.post(url_logout, format="json")
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = token
+
+        response = self.client.get(url_status, format="json")
+        self.assertEqual(response.status_code, 401)
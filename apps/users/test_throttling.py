@@ -0,0 +1,105 @@
+"""
+User login throttle tests.
+"""
+import base64
+from unittest import mock
+
+# django
+from django.conf import settings
+from django.urls import reverse
+
+# local api
+from apps.users import views
+from apps.users.tests import UserTestCase
+from common.throttling import get_login_counters
+
+
+class UserLoginThrottleTests(UserTestCase):
+    """
+    Test the login attempt limits.
+    """
+
+    def test_user_login_throttled(self):
+        """
+        User login attempts over the username limit are rejected without queries.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        limit, window = settings.LOGIN_THROTTLE["USERNAME_RATE"]
+        wrong_password = {**self.mock_data, "password": "wrong"}
+
+        self.client.post(url_register, self.mock_data, format="json")
+        # every hit lands at the start of one window, whatever the clock says
+        with mock.patch("common.throttling.time.time", return_value=window * 1000.0):
+            for _ in range(limit):
+                response = self.client.post(url_login, wrong_password, format="json")
+                self.assertEqual(response.status_code, 400)
+
+            with self.assertNumQueries(0):
+                response = self.client.post(url_login, self.mock_data, format="json")
+
+            self.assertEqual(response.status_code, 429)
+            self.assertIn("Retry-After", response)
+
+            response = self.client.post(
+                url_login,
+                {**self.mock_data, "username": "other@email.com"},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_user_login_throttled_basic_auth(self):
+        """
+        Throttled logins with Basic credentials run no query and no password hash.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        limit, window = settings.LOGIN_THROTTLE["USERNAME_RATE"]
+        wrong_password = {**self.mock_data, "password": "wrong"}
+        basic = base64.b64encode(
+            f"{self.mock_data['username']}:{self.mock_data['password']}".encode()
+        ).decode()
+
+        self.client.post(url_register, self.mock_data, format="json")
+        with mock.patch("common.throttling.time.time", return_value=window * 1000.0):
+            for _ in range(limit):
+                self.client.post(url_login, wrong_password, format="json")
+
+            self.client.credentials(HTTP_AUTHORIZATION=f"Basic {basic}")
+            with mock.patch(
+                "django.contrib.auth.base_user.check_password"
+            ) as model_check, mock.patch.object(
+                views, "check_password"
+            ) as view_check, self.assertNumQueries(
+                0
+            ):
+                for password in (self.mock_data["password"], "wrong"):
+                    response = self.client.post(
+                        url_login, {**self.mock_data, "password": password}
+                    )
+                    self.assertEqual(response.status_code, 429)
+            model_check.assert_not_called()
+            view_check.assert_not_called()
+
+    def test_user_login_throttled_by_ip(self):
+        """
+        User login attempts are counted per REMOTE_ADDR, not X-Forwarded-For.
+        """
+        url_login = reverse("user-login")
+        _, by_ip = get_login_counters()
+
+        with mock.patch.object(by_ip, "limit", 3):
+            for index in range(3):
+                response = self.client.post(
+                    url_login,
+                    {"username": f"user{index}@email.com", "password": "wrong"},
+                    HTTP_X_FORWARDED_FOR=f"10.0.0.{index}",
+                )
+                self.assertEqual(response.status_code, 400)
+
+            response = self.client.post(
+                url_login,
+                {"username": "user9@email.com", "password": "wrong"},
+                HTTP_X_FORWARDED_FOR="10.0.0.9",
+            )
+        self.assertEqual(response.status_code, 429)
@@ -1,26 +1,24 @@
 """
 User tests.
 """
+from asgiref.sync import async_to_sync
 # django
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 # rest framework
 from rest_framework.test import APITestCase
 
 # local api
 from apps.users.models import User
+from common.authentication import get_user_cache
+from common.throttling import get_login_counters
 
 
-class UserManagementTests(APITestCase):
+class UserTestCase(APITestCase):
     """
-    Test CRUD operations for users
-    ( POST {{apiUrl}}/api/user/register/ ) - Create
-    ( POST {{apiUrl}}/api/user/login/ ) - Read
-    ( GET {{apiUrl}}/api/user/status/ ) - Read
-    ( POST {{apiUrl}}/api/user/logout/ ) - Read
-    ( DELETE {{apiUrl}}/api/user/remove/ ) - Delete
-    ( POST {{apiUrl}}/api/user/deposit/ ) - Update
-    ( POST {{apiUrl}}/api/user/reset/ ) - Update
+    Shared fixtures of the user tests.
     """
 
     mock_data = {
@@ -29,11 +27,52 @@ class UserManagementTests(APITestCase):
     }
 
     def setUp(self):
+        for counter in get_login_counters():
+            counter.clear()
+        get_user_cache().clear()
         self.client.credentials(HTTP_AUTHORIZATION=getattr(settings, "TOKEN", ""))
 
+
     def tearDown(self):
         self.client.logout()
 
+
+    def async_get(self, path, **headers):
+        """
+        GET path through the ASGI handler with the async test client.
+        """
+
+        async def get():
+            return await self.async_client.get(path, **headers)
+
+        return async_to_sync(get)()
+
+
+    def async_post(self, path, data):
+        """
+        POST data as JSON through the ASGI handler with the async test client.
+        """
+
+        async def post():
+            return await self.async_client.post(
+                path, data, content_type="application/json"
+            )
+
+        return async_to_sync(post)()
+
+
+class UserManagementTests(UserTestCase):
+    """
+    Test CRUD operations for users
+    ( POST {{apiUrl}}/api/user/register/ ) - Create
+    ( POST {{apiUrl}}/api/user/login/ ) - Read
+    ( GET {{apiUrl}}/api/user/status/ ) - Read
+    ( POST {{apiUrl}}/api/user/logout/ ) - Read
+    ( DELETE {{apiUrl}}/api/user/remove/ ) - Delete
+    ( POST {{apiUrl}}/api/user/deposit/ ) - Update
+    ( POST {{apiUrl}}/api/user/reset/ ) - Update
+    """
+
     def test_user_register_success(self):
         """
         User register success.
@@ -52,6 +91,53 @@ class UserManagementTests(APITestCase):
         self.assertEqual(json_response["deposit"], 0)
         self.assertEqual(json_response["role"], "BUYER")
 
+    def test_user_register_single_insert(self):
+        """
+        User register writes the user row exactly once.
+        """
+        url = reverse("user-register")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, self.mock_data, format="json")
+
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(('INSERT INTO "user"', 'UPDATE "user"'))
+        ]
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT INTO "user"'))
+
+    def test_user_bulk_provision(self):
+        """
+        User bulk provisioning creates valid users and reports the rest by index.
+        """
+        url_login = reverse("user-login")
+        url_bulk = reverse("user-bulk")
+        User.objects.create_user(**self.mock_data, is_staff=True)
+        self.client.post(url_login, self.mock_data, format="json")
+
+        payload = [
+            {"username": "a@email.com", "password": "test1234"},
+            {"username": self.mock_data["username"], "password": "test1234"},
+            {"username": "invalid", "password": "test1234"},
+            {"username": "a@email.com", "password": "test1234"},
+            {"username": "b@email.com", "password": "test1234", "role": "SELLER"},
+        ]
+        response = self.client.post(url_bulk, payload, format="json")
+        json_response = response.json()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [user["username"] for user in json_response["results"]],
+            ["a@email.com", "b@email.com"],
+        )
+        self.assertEqual(list(json_response["errors"]), ["1", "2", "3"])
+        user = User.objects.get(username="b@email.com")
+        self.assertEqual(user.role, "SELLER")
+        self.assertTrue(user.check_password("test1234"))
+
     def test_user_register_invalid_payload(self):
         """
         User register with invalid payload.
@@ -195,6 +281,54 @@ class UserManagementTests(APITestCase):
             f"Deposit successful. Your new balance is {user.deposit}",
         )
 
+    def test_user_deposit_coins_success(self):
+        """
+        User deposit of several coins updates only the deposit column.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_deposit = reverse("user-deposit")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+
+        deposit_data = {"coins": [100, 50, 5, 5]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url_deposit, deposit_data, format="json")
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "user"')
+        ]
+        user = User.objects.filter(username=self.mock_data["username"]).get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user.deposit, 160)
+        self.assertEqual(
+            response.json()["success"], "Deposit successful. Your new balance is 160"
+        )
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn("password", updates[0])
+
+    def test_user_deposit_coins_invalid_coin(self):
+        """
+        User deposit of several coins rejects unknown coins.
+        """
+        url_register = reverse("user-register")
+        url_login = reverse("user-login")
+        url_deposit = reverse("user-deposit")
+
+        self.client.post(url_register, self.mock_data, format="json")
+        self.client.post(url_login, self.mock_data, format="json")
+
+        response = self.client.post(url_deposit, {"coins": [100, 3]}, format="json")
+        user = User.objects.filter(username=self.mock_data["username"]).get()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"][0], "Invalid input")
+        self.assertEqual(user.deposit, 0)
+
     def test_user_deposit_invalid_request(self):
         """
         User deposit action without being authenticated.
@@ -7,8 +7,20 @@ from . import views
 
 urlpatterns = [
     path("register/", views.UserRegisterView.as_view(), name="user-register"),
+    path(
+        "register/async/",
+        views.AsyncUserRegisterView.as_view(),
+        name="user-register-async",
+    ),
+    path("bulk/", views.UserBulkView.as_view(), name="user-bulk"),
     path("login/", view=views.UserLoginView.as_view(), name="user-login"),
+    path("login/async/", views.AsyncUserLoginView.as_view(), name="user-login-async"),
     path("status/", views.CheckUserStatusView.as_view(), name="user-status"),
+    path(
+        "status/async/",
+        views.AsyncCheckUserStatusView.as_view(),
+        name="user-status-async",
+    ),
     path("logout/", views.UserLogoutView.as_view(), name="user-logout"),
     path("remove/", views.UserRemoveView.as_view(), name="user-remove"),
     path("deposit/", views.UserDepositView.as_view(), name="user-deposit"),
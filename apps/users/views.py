@@ -1,17 +1,22 @@
 """
 User views.
 """
+from asgiref.sync import sync_to_async
 from django.contrib.auth import login, logout
 from django.contrib.auth.hashers import check_password
 from rest_framework import authentication, generics, permissions, status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import Throttled, ValidationError
 from rest_framework.response import Response
 
+from common.hashing import acheck_password
+from common.idempotency import idempotent
 from common.permissions import IsBuyer
+from common.throttling import LoginRateThrottle
+from common.views import AsyncAnonymousAPIView, AsyncAPIView
 
 from .models import User
 from .serializers import RegisterSerializer
-from .services import deposit_amount, reset_amount
+from .services import deposit_amount, deposit_coins, reset_amount
 
 
 # REGISTER
@@ -29,11 +34,17 @@ class UserRegisterView(generics.CreateAPIView):
 class UserLoginView(generics.RetrieveAPIView):
     """
     User login.
+
+    * Attempts are limited per username and per client IP, see ``LOGIN_THROTTLE``.
+    * No authentication runs, so throttled attempts hash no password, not
+      even the credentials of an ``Authorization`` header.
     """
 
     queryset = User.objects.all()
     model = User
     serializer_class = RegisterSerializer
+    authentication_classes = []
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request):
         """
@@ -52,6 +63,7 @@ class UserLoginView(generics.RetrieveAPIView):
 
         if user and check_password(request.data.get("password"), user.password):
             login(request, user)
+            LoginRateThrottle.reset(request)
             return Response(
                 {"success": f"Welcome {request.user}: {request.user.role}"},
                 status=status.HTTP_200_OK,
@@ -59,6 +71,68 @@ class UserLoginView(generics.RetrieveAPIView):
         raise ValidationError("Invalid Credentials")
 
 
+class AsyncUserRegisterView(AsyncAnonymousAPIView):
+    """
+    User registration on the async request path.
+
+    * The password is hashed in the hasher pool, off the event loop.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Register user.
+
+        ```
+        :param HttpRequest request: client request with a JSON body
+        :return: Response with status 201
+        :raise: Validation error with status 400
+        ```
+        """
+        serializer = RegisterSerializer(data=self.parse_body(request))
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        user = await User.objects.acreate_user(**serializer.validated_data)
+        return self.render(RegisterSerializer(user).data, status=201)
+
+
+class AsyncUserLoginView(AsyncAnonymousAPIView):
+    """
+    User login on the async request path.
+
+    * Attempts are limited like ``UserLoginView``.
+    * The password is verified in the hasher pool, off the event loop.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Login user.
+
+        ```
+        :param HttpRequest request: client request with a JSON body
+        :return: Response with status 200
+        :raise: Validation error with status 400
+        ```
+        """
+        request.data = self.parse_body(request)
+        throttle = LoginRateThrottle()
+        if not throttle.allow_request(request, self):
+            raise Throttled(throttle.wait())
+
+        password = request.data.get("password")
+        user = await User.objects.filter(
+            username=request.data.get("username"),
+        ).afirst()
+
+        if (
+            user
+            and isinstance(password, str)
+            and await acheck_password(password, user.password)
+        ):
+            await sync_to_async(login)(request, user)
+            LoginRateThrottle.reset(request)
+            return self.render({"success": f"Welcome {user}: {user.role}"})
+        raise ValidationError("Invalid Credentials")
+
+
 # STATUS
 class CheckUserStatusView(generics.RetrieveAPIView):
     """
@@ -91,6 +165,27 @@ class CheckUserStatusView(generics.RetrieveAPIView):
         )
 
 
+class AsyncCheckUserStatusView(AsyncAPIView):
+    """
+    Check user status on the async request path.
+
+    * Requires session authentication.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Retrieve user status.
+
+        ```
+        :param HttpRequest request: client request with session cookie
+        :return: Response with status 200
+        ```
+        """
+        return self.render(
+            {"success": f"Logged in as: {request.user} : {request.user.role}"}
+        )
+
+
 # LOGOUT
 class UserLogoutView(generics.RetrieveAPIView):
     """
@@ -145,11 +240,57 @@ class UserRemoveView(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
+class UserBulkView(generics.GenericAPIView):
+    """
+    Provision users in bulk.
+
+    * Requires session authentication as a staff user.
+    * Accepts a list of users as for registration.
+    * Invalid items are reported by index and do not abort the batch.
+    """
+
+    queryset = User.objects.all()
+    model = User
+    serializer_class = RegisterSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+    authentication_classes = [authentication.SessionAuthentication]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Create users.
+
+        ```
+        :param Request request: client request with authorization in header
+        :return: Response with status 201
+        :raise: ValidationError if no user is valid
+        ```
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        valid, errors = serializer.validate_items()
+
+        users = []
+        if valid:
+            users = serializer.create([data for _, _, data in valid])
+
+        if errors and not users:
+            raise ValidationError({"errors": errors})
+
+        return Response(
+            {
+                "results": RegisterSerializer(users, many=True).data,
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
 class UserDepositView(generics.GenericAPIView):
     """
     Deposit amount in user account.
 
     * Requires session authentication.
+    * Accepts a single coin as ``amount`` or a list of coins as ``coins``.
+    * Retries carrying the same ``Idempotency-Key`` header replay the response.
     """
 
     queryset = User.objects.all()
@@ -158,6 +299,7 @@ class UserDepositView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated, IsBuyer]
     authentication_classes = [authentication.SessionAuthentication]
 
+    @idempotent
     def post(self, request):
         """
         User deposit.
@@ -168,18 +310,20 @@ class UserDepositView(generics.GenericAPIView):
         :raise: Validation error with status 400
         ```
         """
-        if request.data is None or not request.data["amount"]:
+        if not request.data or not (
+            request.data.get("amount") or request.data.get("coins")
+        ):
             raise ValidationError("Invalid input")
 
-        response = deposit_amount(request.user, request.data["amount"])
+        if "coins" in request.data:
+            balance = deposit_coins(request.user, request.data["coins"])
+        else:
+            balance = deposit_amount(request.user, request.data["amount"])
 
-        if response:
-            return Response(
-                {
-                    "success": f"Deposit successful. Your new balance is {request.user.deposit}"
-                },
-                status=status.HTTP_200_OK,
-            )
+        return Response(
+            {"success": f"Deposit successful. Your new balance is {balance}"},
+            status=status.HTTP_200_OK,
+        )
 
 
 class UserResetView(generics.GenericAPIView):
@@ -205,13 +349,11 @@ class UserResetView(generics.GenericAPIView):
         :raise: Validation error with status 400
         ```
         """
-        response = reset_amount(request.user)
+        balance = reset_amount(request.user)
 
-        if response:
-            return Response(
-                {
-                    "success": f"Deposit reset successful. Your available balance is {request.user.deposit}"
-                },
-                status=status.HTTP_200_OK,
-            )
-        raise ValidationError("Something went wrong")
+        return Response(
+            {
+                "success": f"Deposit reset successful. Your available balance is {balance}"
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,64 @@
+"""
+Common ASGI handler.
+
+Django 4.1 iterates the content of streaming responses on the event loop, so
+a generator that reads the database while streaming, like the product
+export, raises ``SynchronousOnlyOperation`` under ASGI. This handler produces
+every chunk in the request's sync thread instead, the thread the view ran
+in, and only sends it from the event loop.
+"""
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+
+def _next_part(parts):
+    return next(parts, None)
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    ASGI handler streaming sync iterators off the event loop.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+
+        headers = [
+            (
+                header.encode("ascii") if isinstance(header, str) else header,
+                value.encode("latin1") if isinstance(value, str) else value,
+            )
+            for header, value in response.items()
+        ]
+        headers += [
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": headers,
+            }
+        )
+
+        parts = iter(response)
+        next_part = sync_to_async(_next_part, thread_sensitive=True)
+        while (part := await next_part(parts)) is not None:
+            for chunk, _ in self.chunk_bytes(part):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    """
+    ``django.core.asgi.get_asgi_application`` returning the project handler.
+    """
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,199 @@
+"""
+Common project authentication classes.
+"""
+import copy
+import hashlib
+import hmac
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+    load_backend,
+)
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.core.exceptions import SuspiciousOperation
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from rest_framework import authentication
+
+from .cache import TTLCache
+
+_credential_cache = None
+_user_cache = None
+
+
+def get_credential_cache():
+    """
+    Return the process wide cache of verified Basic credentials.
+    """
+    global _credential_cache  # pylint: disable=global-statement
+    if _credential_cache is None:
+        config = getattr(settings, "BASIC_AUTH_CACHE", {})
+        _credential_cache = TTLCache(
+            max_size=config.get("MAX_SIZE", 10000), ttl=config.get("TTL", 300)
+        )
+    return _credential_cache
+
+
+def invalidate_credentials(username):
+    """
+    Forget any verified credentials cached for username.
+    """
+    get_credential_cache().delete(username)
+
+
+def get_user_cache():
+    """
+    Return the process wide cache of user rows keyed by primary key.
+    """
+    global _user_cache  # pylint: disable=global-statement
+    if _user_cache is None:
+        config = getattr(settings, "USER_CACHE", {})
+        _user_cache = TTLCache(
+            max_size=config.get("MAX_SIZE", 10000), ttl=config.get("TTL", 30)
+        )
+    return _user_cache
+
+
+def cached_user(user_id):
+    """
+    Return a copy of the cached user row, or None.
+    """
+    user = get_user_cache().get(user_id)
+    return copy.copy(user) if user is not None else None
+
+
+def invalidate_user(user_id):
+    """
+    Forget the cached row of a user, now and once the current transaction
+    commits, so a read racing the commit cannot keep the old row cached.
+    """
+    get_user_cache().delete(user_id)
+    transaction.on_commit(lambda: get_user_cache().delete(user_id))
+
+
+def _credential_digest(username, password):
+    """
+    Keyed digest of a username/password pair, so raw passwords are never kept.
+    """
+    message = f"{username}\x00{password}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).digest()
+
+
+class CachedBasicAuthentication(authentication.BasicAuthentication):
+    """
+    HTTP Basic authentication that remembers recently verified credentials.
+
+    A successful check stores the user together with a keyed digest of the
+    credentials, so repeated requests skip the password hasher and the user
+    lookup. Entries expire after ``BASIC_AUTH_CACHE["TTL"]`` seconds and are
+    dropped whenever the user row changes.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        cache = get_credential_cache()
+        digest = _credential_digest(userid, password)
+
+        entry = cache.get(userid)
+        if entry is not None and hmac.compare_digest(entry[0], digest):
+            return (copy.copy(entry[1]), None)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(userid, (digest, copy.copy(user)))
+        return (user, auth)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Model backend serving session users from the in-process user cache.
+
+    ``AuthenticationMiddleware`` resolves the session user through
+    ``get_user()`` on every request; cached rows skip the user query.
+    Entries are dropped on saves, updates and deletes, and expire after
+    ``USER_CACHE["TTL"]`` seconds for changes made by other processes.
+    """
+
+    def get_user(self, user_id):
+        user = cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                get_user_cache().set(user.pk, copy.copy(user))
+            return user
+        return user if self.user_can_authenticate(user) else None
+
+
+async def _aload_session(session):
+    """
+    Return the data of session, read with the async ORM for database sessions.
+    """
+    if session.session_key is None:
+        return {}
+    if type(session).load is not DatabaseSessionStore.load:
+        return await sync_to_async(session.load)()
+    try:
+        row = await session.model.objects.aget(
+            session_key=session.session_key, expire_date__gt=timezone.now()
+        )
+    except (session.model.DoesNotExist, SuspiciousOperation):
+        return {}
+    return session.decode(row.session_data)
+
+
+async def _amodel_backend_user(backend, user_id):
+    """
+    Async ``ModelBackend.get_user``, served from the user cache for
+    ``CachedModelBackend``.
+    """
+    cached = isinstance(backend, CachedModelBackend)
+    user = cached_user(user_id) if cached else None
+    if user is None:
+        user_model = get_user_model()
+        try:
+            user = await user_model.objects.aget(pk=user_id)
+        except user_model.DoesNotExist:
+            return None
+        if cached:
+            get_user_cache().set(user.pk, copy.copy(user))
+    return user if backend.user_can_authenticate(user) else None
+
+
+async def aget_user(request):
+    """
+    Async ``django.contrib.auth.get_user`` for the session of request.
+
+    ```
+    :return: User, or AnonymousUser if the session is missing or stale
+    ```
+    """
+    session = await _aload_session(request.session)
+    try:
+        # pylint: disable-next=protected-access
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    backend = load_backend(backend_path)
+    if isinstance(backend, ModelBackend):
+        user = await _amodel_backend_user(backend, user_id)
+    else:
+        user = await sync_to_async(backend.get_user)(user_id)
+    if user is None:
+        return AnonymousUser()
+
+    session_hash = session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        return AnonymousUser()
+    return user
@@ -0,0 +1,45 @@
+"""
+Common conditional GET helpers.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from the parts identifying a representation.
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode())
+    return quote_etag(digest.hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response if the request validators match, otherwise None.
+
+    The 304 carries the same validators as a full response would.
+
+    :param Request request: client request
+    :param str etag: Current ETag of the resource
+    :param datetime last_modified: Last modification time of the resource
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Add the ETag and Last-Modified headers to response.
+    """
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
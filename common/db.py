@@ -0,0 +1,50 @@
+"""
+Common database helpers.
+"""
+from django.db import connections, router
+from django.db.models import sql
+
+
+def _write_alias(queryset):
+    # like QuerySet.update(): honour .using(), otherwise route as a write
+    # pylint: disable-next=protected-access
+    return queryset._db or router.db_for_write(queryset.model)
+
+
+def update_returning(queryset, fields, **values):
+    """
+    Apply ``queryset.update(**values)`` and return the updated rows.
+
+    The statement is issued as ``UPDATE ... RETURNING`` (PostgreSQL, SQLite
+    3.35+), so the new column values come back without a second query. Rows
+    are returned as model instances with only ``fields`` loaded.
+
+    :param QuerySet queryset: Rows to update, including any guard filters
+    :param iterable fields: Attribute names to load on the returned instances
+    :return: list of updated model instances
+    """
+    opts = queryset.model._meta  # pylint: disable=protected-access
+    using = _write_alias(queryset)
+    fields = set(fields)
+    loaded = [field for field in opts.concrete_fields if field.attname in fields]
+
+    query = queryset.query.chain(sql.UpdateQuery)
+    query.add_update_values(values)
+    compiler = query.get_compiler(using)
+    update_sql, params = compiler.as_sql()
+    returning = ", ".join(
+        compiler.quote_name_unless_alias(field.column) for field in loaded
+    )
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"{update_sql} RETURNING {returning}", params)
+        rows = cursor.fetchall()
+
+    converters = compiler.get_converters(
+        [field.get_col(opts.db_table) for field in loaded]
+    )
+    if converters:
+        rows = compiler.apply_converters(rows, converters)
+
+    names = [field.attname for field in loaded]
+    return [queryset.model.from_db(using, names, row) for row in rows]
@@ -0,0 +1,159 @@
+"""
+Common password hashing offloaded to worker processes.
+
+PBKDF2 holds the GIL for tens of milliseconds per call. On the async login
+path hashes are computed in a bounded process pool instead, so the event
+loop keeps serving other requests while passwords are hashed on other
+cores. Requests beyond ``PASSWORD_HASHING["MAX_PENDING"]`` in flight are
+rejected rather than queued without limit. Bulk user provisioning hashes
+its batches across the same workers.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .metrics import registry
+
+
+class HashingBusy(APIException):
+    """
+    Raised when too many password hashes are already in flight.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, retry shortly."
+    default_code = "hashing_busy"
+
+
+def _init_worker():
+    # pylint: disable=import-outside-toplevel
+    import django
+
+    django.setup()
+
+
+def _make(password):
+    started = time.time()
+    return make_password(password), started, time.time()
+
+
+def _make_plain(password):
+    return make_password(password)
+
+
+def _check(password, encoded):
+    started = time.time()
+    return check_password(password, encoded), started, time.time()
+
+
+class HasherPool:
+    """
+    Bounded process pool running password hashers.
+    """
+
+    def __init__(self, workers=None, max_pending=256):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    async def run(self, func, *args):
+        """
+        Run func in a worker, recording queue and hashing time.
+
+        ```
+        :raise: HashingBusy if max_pending calls are already in flight
+        ```
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingBusy()
+            self._pending += 1
+
+        submitted = time.time()
+        try:
+            future = self._get_executor().submit(func, *args)
+            result, started, finished = await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        registry.observe("password_hash_queue_seconds", max(started - submitted, 0))
+        registry.observe("password_hash_seconds", finished - started)
+        return result
+
+    def map(self, func, items, chunksize=1):
+        """
+        Run func over items in the workers and return the results in order.
+        """
+        return list(self._get_executor().map(func, items, chunksize=chunksize))
+
+    def shutdown(self):
+        """
+        Stop the worker processes.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+_pool = None
+
+
+def get_hasher_pool():
+    """
+    Return the process wide hasher pool.
+    """
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        config = getattr(settings, "PASSWORD_HASHING", {})
+        _pool = HasherPool(
+            workers=config.get("WORKERS"), max_pending=config.get("MAX_PENDING", 256)
+        )
+    return _pool
+
+
+async def amake_password(password):
+    """
+    Async ``make_password`` computed in the hasher pool.
+    """
+    return await get_hasher_pool().run(_make, password)
+
+
+def make_passwords(passwords):
+    """
+    Hash many passwords in parallel across the hasher pool workers.
+    """
+    passwords = list(passwords)
+    workers = get_hasher_pool().workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return get_hasher_pool().map(_make_plain, passwords, chunksize=chunksize)
+
+
+async def acheck_password(password, encoded):
+    """
+    Async ``check_password`` computed in the hasher pool.
+    """
+    if not encoded or password is None:
+        return False
+    return await get_hasher_pool().run(_check, password, encoded)
@@ -0,0 +1,156 @@
+"""
+Common idempotency key support for unsafe endpoints.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from apps.users.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _fingerprint(request):
+    """
+    Digest identifying the method, path and payload of a request.
+    """
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    message = f"{request.method}\x00{request.path}\x00{payload}"
+    return hashlib.sha256(message.encode()).hexdigest()
+
+
+class IdempotencyKeyInProgress(APIException):
+    """
+    Raised when a request reuses the key of a request that is still running.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is in progress."
+    default_code = "idempotency_key_in_progress"
+
+
+def _replay(record):
+    if record.status_code is None:
+        raise IdempotencyKeyInProgress()
+    response = HttpResponse(
+        bytes(record.body), status=record.status_code, content_type="application/json"
+    )
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _claim(user_id, key, fingerprint, now):
+    """
+    Claim key for a new request, or return the stored row of an earlier one.
+
+    The claim commits on its own, so a concurrent duplicate finds it marked
+    in progress instead of waiting for the first request to finish. A claim
+    left behind by a crashed request can be taken over after
+    ``IDEMPOTENCY_KEY_LOCK_TTL`` seconds; one whose request still holds the
+    row lock is reported in progress.
+
+    ```
+    :return: (record, claimed)
+    ```
+    """
+    lock_until = now + timedelta(
+        seconds=getattr(settings, "IDEMPOTENCY_KEY_LOCK_TTL", 60)
+    )
+    with transaction.atomic():
+        record, created = IdempotencyKey.objects.get_or_create(
+            user_id=user_id,
+            key=key,
+            defaults={"fingerprint": fingerprint, "expires_at": lock_until},
+        )
+        if created or record.expires_at > now:
+            return record, created
+
+        expired = (
+            IdempotencyKey.objects.select_for_update(skip_locked=True)
+            .filter(pk=record.pk, expires_at__lte=now)
+            .first()
+        )
+        if expired is None:
+            record.status_code = None
+            return record, False
+
+        expired.fingerprint = fingerprint
+        expired.expires_at = lock_until
+        expired.status_code = None
+        expired.body = None
+        expired.save()
+        return expired, True
+
+
+def idempotent(handler):
+    """
+    Replay the stored response of requests retried with the same key.
+
+    When the ``Idempotency-Key`` header is present, the key is claimed before
+    the handler runs. The handler then runs in one transaction with the
+    claimed row locked, and its successful response is stored on the row in
+    that same transaction, so the writes and the stored response commit or
+    roll back together. Retries get the original response back without
+    running the handler again, and duplicates arriving while it still runs
+    get a 409. Failed requests release the key and may be retried. Keys
+    expire after ``IDEMPOTENCY_KEY_TTL`` seconds.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            raise ValidationError(f"Invalid {IDEMPOTENCY_HEADER} header")
+
+        fingerprint = _fingerprint(request)
+        now = timezone.now()
+        record, claimed = _claim(request.user.pk, key, fingerprint, now)
+        if not claimed:
+            if record.fingerprint != fingerprint:
+                raise ValidationError(
+                    f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+            return _replay(record)
+
+        stored = False
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.select_for_update().get(pk=record.pk)
+                response = handler(view, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    record.expires_at = now + timedelta(
+                        seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 86400)
+                    )
+                    record.status_code = response.status_code
+                    record.body = JSONRenderer().render(response.data)
+                    record.save()
+            stored = status.is_success(response.status_code)
+        finally:
+            if not stored:
+                record.delete()
+
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    """
+    Delete expired idempotency keys.
+
+    :return: number of deleted keys
+    """
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
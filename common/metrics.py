@@ -0,0 +1,291 @@
+"""
+Common per-request instrumentation.
+
+Every request records its latency, SQL query count and time, and serializer
+time under its URL route. Samples are aggregated in per-thread shards, so
+recording takes no lock; shards are only summed when the metrics endpoint
+is scraped.
+"""
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+def _buckets():
+    return tuple(getattr(settings, "METRICS", {}).get("BUCKETS", DEFAULT_BUCKETS))
+
+
+class RequestMetrics:
+    """
+    Counters of the current request.
+    """
+
+    __slots__ = ("queries", "query_time", "serializer_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+
+
+class MetricsRegistry:
+    """
+    Per-process aggregates of request metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = ({}, {}, {})
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, key, duration, metrics):
+        """
+        Add one finished request to the calling thread's shard.
+
+        :param tuple key: (route, method, status) of the request
+        :param float duration: Seconds the request took
+        :param RequestMetrics metrics: Counters of the request
+        """
+        requests, statuses, _ = self._shard()
+        row = requests.get(key[:2])
+        if row is None:
+            buckets = _buckets()
+            row = requests[key[:2]] = [buckets, [0] * len(buckets), 0, 0.0, 0, 0.0, 0.0]
+        for index, bound in enumerate(row[0]):
+            if duration <= bound:
+                row[1][index] += 1
+                break
+        row[2] += 1
+        row[3] += duration
+        row[4] += metrics.queries
+        row[5] += metrics.query_time
+        row[6] += metrics.serializer_time
+
+        statuses[key] = statuses.get(key, 0) + 1
+
+    def observe(self, name, value):
+        """
+        Add value to the ``name`` summary of the calling thread's shard.
+        """
+        summaries = self._shard()[2]
+        summary = summaries.get(name)
+        if summary is None:
+            summary = summaries[name] = [0, 0.0]
+        summary[0] += 1
+        summary[1] += value
+
+    def collect(self):
+        """
+        Sum every shard.
+
+        :return: (requests, statuses, summaries) keyed like the shards
+        """
+        with self._lock:
+            shards = list(self._shards)
+
+        requests, statuses, summaries = {}, {}, {}
+        for shard_requests, shard_statuses, shard_summaries in shards:
+            for key, row in list(shard_requests.items()):
+                total = requests.get(key)
+                if total is None:
+                    requests[key] = [row[0], list(row[1]), *row[2:]]
+                    continue
+                total[1] = [a + b for a, b in zip(total[1], row[1])]
+                for index in range(2, 7):
+                    total[index] += row[index]
+            for key, count in list(shard_statuses.items()):
+                statuses[key] = statuses.get(key, 0) + count
+            for name, (count, total) in list(shard_summaries.items()):
+                summary = summaries.setdefault(name, [0, 0.0])
+                summary[0] += count
+                summary[1] += total
+        return requests, statuses, summaries
+
+    def render(self):
+        """
+        Render the aggregates in the Prometheus text exposition format.
+        """
+        requests, statuses, summaries = self.collect()
+        lines = _render_histograms(requests)
+        lines += _render_totals(requests)
+        lines += _render_statuses(statuses)
+        for name, (count, total) in sorted(summaries.items()):
+            lines += [
+                f"# TYPE {name} summary",
+                f"{name}_count {count}",
+                f"{name}_sum {total}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(requests):
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (route, method), row in sorted(requests.items()):
+        labels = f'route="{_escape(route)}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip(row[0], row[1]):
+            cumulative += count
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                f"{cumulative}"
+            )
+        lines.append(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {row[2]}'
+        )
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {row[3]}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {row[2]}")
+    return lines
+
+
+def _render_totals(requests):
+    lines = []
+    for name, index, help_text in (
+        ("db_queries_total", 4, "SQL queries by route."),
+        ("db_query_seconds_total", 5, "SQL time by route."),
+        ("serializer_seconds_total", 6, "Serializer time by route."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (route, method), row in sorted(requests.items()):
+            lines.append(
+                f'{name}{{route="{_escape(route)}",method="{method}"}} {row[index]}'
+            )
+    return lines
+
+
+def _render_statuses(statuses):
+    lines = [
+        "# HELP http_responses_total Responses by route and status.",
+        "# TYPE http_responses_total counter",
+    ]
+    for (route, method, status), count in sorted(statuses.items()):
+        lines.append(
+            f'http_responses_total{{route="{_escape(route)}",method="{method}",'
+            f'status="{status}"}} {count}'
+        )
+    return lines
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+@contextlib.contextmanager
+def serializer_timer():
+    """
+    Add the time spent in the block to the current request's serializer time.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+
+
+class TimedDataMixin:
+    """
+    Count the time spent building a serializer's ``data`` as serializer time.
+    """
+
+    @property
+    def data(self):
+        """
+        Serialized data, timed as serializer time.
+        """
+        with serializer_timer():
+            return super().data
+
+
+def _count_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_time += time.perf_counter() - start
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    Count the queries of every new database connection.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+connection_created.connect(install_query_counter)
+
+
+def _instrument_connections():
+    # connections opened before this module was imported missed the signal
+    for connection in connections.all(initialized_only=True):
+        install_query_counter(None, connection)
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):
+    """
+    Record latency, SQL and serializer time of every request.
+    """
+
+    def finish(request, response, start, token):
+        duration = time.perf_counter() - start
+        metrics = _current.get()
+        _current.reset(token)
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "<unmatched>"
+        registry.record(
+            (route, request.method, response.status_code), duration, metrics
+        )
+        return response
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            start = time.perf_counter()
+            token = _current.set(RequestMetrics())
+            _instrument_connections()
+            response = await get_response(request)
+            return finish(request, response, start, token)
+
+    else:
+
+        def middleware(request):
+            start = time.perf_counter()
+            token = _current.set(RequestMetrics())
+            _instrument_connections()
+            response = get_response(request)
+            return finish(request, response, start, token)
+
+    return middleware
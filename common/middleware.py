@@ -0,0 +1,63 @@
+"""
+Common project middleware.
+"""
+import asyncio
+
+from django.utils.decorators import sync_and_async_middleware
+
+from .routers import begin_routing, end_routing, replica_config
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@sync_and_async_middleware
+def ReplicaRoutingMiddleware(get_response):
+    """
+    Let safe requests read from replicas, with read-your-writes stickiness.
+
+    A request that writes sets a cookie pinning the client to the primary for
+    ``READ_REPLICAS["PIN_SECONDS"]``, so its next reads see its own writes
+    even while the replicas lag behind. Clients that drop cookies, like most
+    Basic auth API clients, are not pinned.
+    """
+
+    def use_replica(request):
+        config = replica_config()
+        return (
+            request.method in SAFE_METHODS
+            and config.get("COOKIE_NAME", "primary_pin") not in request.COOKIES
+        )
+
+    def pin(response, state):
+        if state.wrote:
+            config = replica_config()
+            response.set_cookie(
+                config.get("COOKIE_NAME", "primary_pin"),
+                "1",
+                max_age=config.get("PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = begin_routing(use_replica(request))
+            try:
+                response = await get_response(request)
+            finally:
+                state = end_routing(token)
+            return pin(response, state)
+
+    else:
+
+        def middleware(request):
+            token = begin_routing(use_replica(request))
+            try:
+                response = get_response(request)
+            finally:
+                state = end_routing(token)
+            return pin(response, state)
+
+    return middleware
@@ -0,0 +1,32 @@
+"""
+Common project view mixins.
+"""
+
+
+class IdentityMapMixin:
+    """
+    Request scoped identity map for the object a view operates on.
+
+    Permissions and handlers calling ``get_object()`` during the same request
+    share one instance, so the row is fetched from the database only once.
+    Subclasses customise the lookup by overriding ``load_object()``.
+    """
+
+    def get_object(self):
+        """
+        Return the memoized object for this request, loading it on first use.
+        """
+        identity_map = getattr(self.request, "_identity_map", None)
+        if identity_map is None:
+            identity_map = self.request._identity_map = {}
+
+        key = (self.queryset.model, tuple(sorted(self.kwargs.items())))
+        if key not in identity_map:
+            identity_map[key] = self.load_object()
+        return identity_map[key]
+
+    def load_object(self):
+        """
+        Fetch the object from the database.
+        """
+        return super().get_object()
@@ -0,0 +1,280 @@
+"""
+Common project pagination classes.
+"""
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(payload):
+    """
+    Encode a cursor payload as an opaque, URL safe token.
+    """
+    data = json.dumps(payload, separators=(",", ":"), default=_json_default)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by ``encode_cursor``.
+
+    ```
+    :raise: NotFound if the token is malformed
+    ```
+    """
+    try:
+        padding = "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(token + padding))
+    except (binascii.Error, ValueError, TypeError):
+        raise NotFound("Invalid cursor")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def keyset_filter(ordering, position):
+    """
+    Build the filter selecting rows strictly after position in ordering.
+
+    The leading ``>=`` bound on the first column keeps the condition usable
+    as an index range scan; the OR terms break ties on the later columns.
+    """
+    fields = [field.lstrip("-") for field in ordering]
+    lookups = ["lt" if field.startswith("-") else "gt" for field in ordering]
+
+    after = Q()
+    for index, (field, lookup) in enumerate(zip(fields, lookups)):
+        term = Q(**{f"{field}__{lookup}": position[index]})
+        for prev_field, prev_value in zip(fields[:index], position[:index]):
+            term &= Q(**{prev_field: prev_value})
+        after |= term
+
+    bound = Q(**{f"{fields[0]}__{lookups[0]}e": position[0]})
+    return bound & after
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique, stable ordering.
+
+    Pages are selected with a ``WHERE (ordering) > (last row)`` condition
+    rather than an OFFSET, so every page costs the same as the first one.
+    Cursors are opaque tokens carried in the ``next`` and ``previous`` links.
+    """
+
+    ordering = ("created_at", "id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+
+    def __init__(self):
+        self.request = None
+        self.page_size = None
+        self.ordering_used = None
+        self.value_fields = None
+        self.page = []
+        self.has_next = False
+        self.has_previous = False
+
+    def get_page_size(self, request):
+        """
+        Return the requested page size, capped at ``MAX_PAGE_SIZE``.
+        """
+        config = getattr(settings, "KEYSET_PAGINATION", {})
+        max_page_size = config.get("MAX_PAGE_SIZE", 500)
+        default = config.get("PAGE_SIZE", 50)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return max(1, min(size, max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the ordering used for the keyset, ending with a unique field.
+
+        Clients may pick one of the view's ``ordering_fields`` with
+        ``?ordering=<field>`` or ``?ordering=-<field>``; ``id`` breaks ties.
+        """
+        value = request.query_params.get(self.ordering_query_param)
+        if not value:
+            return self.ordering
+
+        if value.lstrip("-") not in getattr(view, "ordering_fields", ()):
+            raise ValidationError({self.ordering_query_param: ["Invalid ordering."]})
+        if value.lstrip("-") == "id":
+            return (value,)
+        return (value, "-id" if value.startswith("-") else "id")
+
+    def get_position(self, row):
+        """
+        Return the ordering values of a row.
+        """
+        if self.value_fields is not None:
+            return tuple(row[len(self.value_fields) :])
+        return attrgetter(*[field.lstrip("-") for field in self.ordering_used])(row)
+
+    def paginate_values(self, queryset, fields, request, view=None):
+        """
+        Paginate queryset as ``values_list(*fields)`` tuples.
+
+        The ordering columns are appended to every row so cursors can be built
+        without model instances; ``zip`` based consumers simply ignore them.
+        """
+        queryset = self._values(queryset, fields, request, view)
+        return self.paginate_queryset(queryset, request, view)
+
+    async def apaginate_values(self, queryset, fields, request, view=None):
+        """
+        Async ``paginate_values``, fetching the page with the async ORM.
+        """
+        queryset = self._values(queryset, fields, request, view)
+        queryset, reverse, cursor = self._page_queryset(queryset, request, view)
+        return self._set_page([row async for row in queryset], reverse, cursor)
+
+    def _values(self, queryset, fields, request, view):
+        ordering = self.get_ordering(request, queryset, view)
+        self.value_fields = tuple(fields)
+        return queryset.values_list(
+            *self.value_fields, *[field.lstrip("-") for field in ordering]
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, reverse, cursor = self._page_queryset(queryset, request, view)
+        return self._set_page(list(queryset), reverse, cursor)
+
+    def _page_queryset(self, queryset, request, view):
+        """
+        Return ``(queryset, reverse, cursor)`` selecting one row past the page.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering_used = tuple(self.get_ordering(request, queryset, view))
+
+        cursor = None
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            cursor = decode_cursor(token)
+            if (
+                not isinstance(cursor, dict)
+                or not isinstance(cursor.get("p"), list)
+                or len(cursor["p"]) != len(self.ordering_used)
+                or cursor.get("o", list(self.ordering)) != list(self.ordering_used)
+            ):
+                raise NotFound("Invalid cursor")
+            cursor["p"] = self._cursor_position(queryset, cursor["p"])
+
+        reverse = bool(cursor and cursor.get("r"))
+        ordering = self.ordering_used
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            )
+        if cursor:
+            queryset = queryset.filter(keyset_filter(ordering, cursor["p"]))
+
+        return queryset.order_by(*ordering)[: self.page_size + 1], reverse, cursor
+
+    def _cursor_position(self, queryset, position):
+        """
+        Convert the cursor position to Python values of the ordering fields.
+
+        ```
+        :raise: NotFound if a value does not fit its field
+        ```
+        """
+        opts = queryset.model._meta  # pylint: disable=protected-access
+        values = []
+        for field, value in zip(self.ordering_used, position):
+            try:
+                value = opts.get_field(field.lstrip("-")).to_python(value)
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound("Invalid cursor")
+            if value is None:
+                raise NotFound("Invalid cursor")
+            values.append(value)
+        return values
+
+    def _set_page(self, rows, reverse, cursor):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def _link(self, position, reverse):
+        payload = {"p": list(position)}
+        if self.ordering_used != tuple(self.ordering):
+            payload["o"] = list(self.ordering_used)
+        if reverse:
+            payload["r"] = 1
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(payload))
+
+    def get_next_link(self):
+        """
+        Link to the page after the last row, if any.
+        """
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self._position_list(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        """
+        Link to the page before the first row, if any.
+        """
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self._position_list(self.page[0]), reverse=True)
+
+    def _position_list(self, row):
+        position = self.get_position(row)
+        return position if isinstance(position, tuple) else (position,)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def to_html(self):
+        """
+        Keyset pages have no browsable API page controls.
+        """
+        return ""
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
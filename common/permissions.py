@@ -19,7 +19,7 @@ class IsOwner(permissions.BasePermission):
     """
 
     def has_permission(self, request, view):
-        return request.user.id == view.get_object().user.id
+        return request.user.id == view.get_object().user_id
 
 
 class IsBuyer(permissions.BasePermission):
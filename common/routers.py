@@ -0,0 +1,92 @@
+"""
+Common project database routers.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing = contextvars.ContextVar("replica_routing", default=None)
+
+
+def replica_config():
+    """
+    Return the ``READ_REPLICAS`` settings.
+    """
+    return getattr(settings, "READ_REPLICAS", {})
+
+
+class RoutingState:
+    """
+    Routing decisions of the current request.
+    """
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def begin_routing(use_replica):
+    """
+    Start routing the current context, return the token for ``end_routing``.
+    """
+    return _routing.set(RoutingState(use_replica))
+
+
+def end_routing(token):
+    """
+    Stop routing the current context and return its state.
+    """
+    state = _routing.get()
+    _routing.reset(token)
+    return state
+
+
+class ReplicaRouter:
+    """
+    Send reads of ``READ_REPLICAS["MODELS"]`` to a replica.
+
+    Only requests marked by ``ReplicaRoutingMiddleware`` read from a replica;
+    everything else, including reads inside a transaction on the primary,
+    stays on ``default``. Every write goes to ``default`` and is recorded so
+    the middleware can pin the client to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        """
+        Return a replica alias for reads of the current request, or None.
+        """
+        state = _routing.get()
+        if state is None or not state.use_replica:
+            return None
+
+        config = replica_config()
+        aliases = config.get("ALIASES", ())
+        label = model._meta.label_lower  # pylint: disable=protected-access
+        if not aliases or label not in config.get("MODELS", ()):
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        """
+        Record the write and send it to ``default``.
+        """
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Allow every relation, replicas hold the same rows as the primary.
+        """
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Only migrate databases that are not replicas.
+        """
+        return db not in replica_config().get("ALIASES", ())
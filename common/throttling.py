@@ -0,0 +1,183 @@
+"""
+Common project throttles.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import TTLCache
+
+
+class SlidingWindowCounter:
+    """
+    Approximate sliding window rate limiter.
+
+    Each key keeps the hit counts of the current and the previous fixed
+    window; the previous count is weighted by how much of it still overlaps
+    the sliding window. State is a small tuple per key in a bounded LRU, or
+    two integer keys per key in a Django cache when ``cache_alias`` is set,
+    so several processes share the limits.
+    """
+
+    def __init__(self, limit, window, *, max_keys=100000, cache_alias=None, prefix=""):
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+        self.cache = caches[cache_alias] if cache_alias else None
+        self._local = TTLCache(max_size=max_keys, ttl=2 * window)
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """
+        Count one hit for key unless it is over the limit.
+
+        ```
+        :return: (allowed, seconds to wait before the next allowed hit)
+        ```
+        """
+        now = time.time()
+        index, elapsed = divmod(now, self.window)
+        index = int(index)
+
+        if self.cache is not None:
+            current, previous = self._shared_counts(key, index)
+        else:
+            with self._lock:
+                current, previous = self._local_counts(key, index)
+
+        fraction = elapsed / self.window
+        if previous * (1 - fraction) + current >= self.limit:
+            return False, self._retry_after(current, previous, fraction)
+
+        if self.cache is not None:
+            shared_key = f"{self.prefix}:{key}:{index}"
+            self.cache.add(shared_key, 0, timeout=2 * self.window)
+            self.cache.incr(shared_key)
+        else:
+            with self._lock:
+                current, previous = self._local_counts(key, index)
+                self._local.set(key, (index, current + 1, previous))
+        return True, None
+
+    def _local_counts(self, key, index):
+        entry = self._local.get(key)
+        if entry is None:
+            return 0, 0
+        entry_index, current, previous = entry
+        if entry_index == index:
+            return current, previous
+        if entry_index == index - 1:
+            return 0, current
+        return 0, 0
+
+    def _shared_counts(self, key, index):
+        current_key = f"{self.prefix}:{key}:{index}"
+        previous_key = f"{self.prefix}:{key}:{index - 1}"
+        counts = self.cache.get_many([current_key, previous_key])
+        return counts.get(current_key, 0), counts.get(previous_key, 0)
+
+    def _retry_after(self, current, previous, fraction):
+        if current < self.limit and previous:
+            # the previous window weighs less as the sliding window moves on
+            needed = 1 - (self.limit - current) / previous
+            return max(needed - fraction, 0) * self.window
+        return (1 - fraction) * self.window
+
+    def reset(self, key):
+        """
+        Forget the hits of key.
+        """
+        if self.cache is not None:
+            index = int(time.time() // self.window)
+            self.cache.delete_many(
+                [f"{self.prefix}:{key}:{index}", f"{self.prefix}:{key}:{index - 1}"]
+            )
+        else:
+            self._local.delete(key)
+
+    def clear(self):
+        """
+        Forget every key of the in-process store.
+        """
+        self._local.clear()
+
+
+_login_counters = None
+
+
+def get_login_counters():
+    """
+    Return the process wide ``(username, ip)`` login attempt counters.
+    """
+    global _login_counters  # pylint: disable=global-statement
+    if _login_counters is None:
+        config = getattr(settings, "LOGIN_THROTTLE", {})
+        options = {
+            "max_keys": config.get("MAX_KEYS", 100000),
+            "cache_alias": config.get("CACHE_ALIAS"),
+        }
+        _login_counters = (
+            SlidingWindowCounter(
+                *config.get("USERNAME_RATE", (5, 60)), prefix="login:user", **options
+            ),
+            SlidingWindowCounter(
+                *config.get("IP_RATE", (100, 60)), prefix="login:ip", **options
+            ),
+        )
+    return _login_counters
+
+
+def _login_ip(request, throttle):
+    # X-Forwarded-For is set by the client unless trusted proxies are declared
+    if api_settings.NUM_PROXIES is None:
+        return request.META.get("REMOTE_ADDR")
+    return throttle.get_ident(request)
+
+
+def _login_username(request):
+    data = request.data
+    username = data.get("username") if hasattr(data, "get") else None
+    return str(username).lower() if username else None
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    Limit login attempts per username and per client IP.
+
+    Runs before the view, so rejected attempts cost no query and no password
+    hash. Rates are ``(attempts, seconds)`` pairs from ``LOGIN_THROTTLE``.
+    Clients are identified by ``REMOTE_ADDR``; ``X-Forwarded-For`` is only
+    used when DRF's ``NUM_PROXIES`` is set.
+    """
+
+    def __init__(self):
+        self.wait_time = None
+
+    def allow_request(self, request, view):
+        by_username, by_ip = get_login_counters()
+        for counter, key in (
+            (by_ip, _login_ip(request, self)),
+            (by_username, _login_username(request)),
+        ):
+            if key is None:
+                continue
+            allowed, self.wait_time = counter.hit(key)
+            if not allowed:
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+    @staticmethod
+    def reset(request):
+        """
+        Forget the failed attempts against the username of a successful login.
+        """
+        username = _login_username(request)
+        if username:
+            get_login_counters()[0].reset(username)
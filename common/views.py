@@ -0,0 +1,123 @@
+"""
+Common project views.
+"""
+import json
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import aget_user
+from .exception_handlers import custom_exception_handler
+from .metrics import registry
+
+
+class AsyncAPIView(View):
+    """
+    Async JSON view for read endpoints served natively on the ASGI path.
+
+    DRF views run in a thread under ASGI; subclasses of this view define
+    ``async def get()`` and stay on the event loop.
+
+    * Requires session authentication, the user is loaded with the async ORM.
+      Views with ``authentication_required = False`` skip the user lookup.
+    * DRF exceptions are rendered through the project exception handler.
+    """
+
+    http_method_names = ["get", "head"]
+    authentication_required = True
+    renderer = JSONRenderer()
+
+    # Django's View.dispatch returns the handler's coroutine for async views
+    async def dispatch(  # pylint: disable=invalid-overridden-method
+        self, request, *args, **kwargs
+    ):
+        # filters and paginators read DRF's request.query_params
+        request.query_params = request.GET
+        try:
+            if not self.authentication_required:
+                return await super().dispatch(request, *args, **kwargs)
+            request.user = await aget_user(request)
+            if not request.user.is_authenticated:
+                exc = exceptions.NotAuthenticated()
+                # like DRF, without a WWW-Authenticate challenge this is a 403
+                exc.status_code = exceptions.PermissionDenied.status_code
+                raise exc
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    @staticmethod
+    def parse_body(request):
+        """
+        Parse the JSON object in the request body.
+
+        ```
+        :raise: ValidationError if the body is not a JSON object
+        ```
+        """
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            raise exceptions.ValidationError("Invalid payload")
+        if not isinstance(data, dict):
+            raise exceptions.ValidationError("Invalid payload")
+        return data
+
+    def render(self, data, status=200):
+        """
+        Render data as a JSON response.
+        """
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status,
+            content_type="application/json",
+        )
+
+    def handle_exception(self, exc):
+        """
+        Render a DRF exception like the synchronous views do.
+        """
+        response = custom_exception_handler(exc, {"view": self})
+        rendered = self.render(response.data, status=response.status_code)
+        for header, value in response.items():
+            if header.lower() != "content-type":
+                rendered[header] = value
+        return rendered
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAnonymousAPIView(AsyncAPIView):
+    """
+    Async JSON view for unauthenticated writes such as login and register.
+
+    Like DRF views for anonymous users, these are not CSRF checked.
+    """
+
+    http_method_names = ["post"]
+    authentication_required = False
+
+
+def metrics_view(request):
+    """
+    Expose the request metrics of this process to Prometheus.
+
+    Readable by staff users, and by scrapers sending
+    ``Authorization: Bearer <METRICS["TOKEN"]>``.
+    """
+    token = getattr(settings, "METRICS", {}).get("TOKEN")
+    if not request.user.is_staff and not (
+        token
+        and constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -48,7 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "common.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -96,6 +98,68 @@ DATABASES = {
     }
 }
 
+# Read replica, set DATABASE_REPLICA_HOST to enable it
+if os.environ.get("DATABASE_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.environ.get("DATABASE_REPLICA_NAME", DATABASES["default"]["NAME"]),
+        "HOST": os.environ.get("DATABASE_REPLICA_HOST"),
+        "PORT": os.environ.get("DATABASE_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["common.routers.ReplicaRouter"]
+
+# Product and user reads of safe requests go to a random replica; clients
+# that wrote are pinned to the primary for PIN_SECONDS
+READ_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "MODELS": ["products.product", "users.user"],
+    "PIN_SECONDS": 5,
+    "COOKIE_NAME": "primary_pin",
+}
+
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Rendered product catalog pages, invalidated by a version counter on writes;
+# with a per-process cache other workers see a write after VALIDATOR_TIMEOUT
+PRODUCT_CATALOG_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+    "VALIDATOR_TIMEOUT": 5,
+}
+
+
+# Bulk product writes: largest accepted batch and rows per INSERT/UPDATE
+PRODUCT_BULK = {
+    "MAX_ITEMS": 5000,
+    "CHUNK_SIZE": 500,
+}
+
+# Rows fetched per server side cursor round trip by the catalog export
+PRODUCT_EXPORT_CHUNK_SIZE = 2000
+
+# Product Server-Sent Events served by the ASGI app: path, events buffered per
+# client before a slow client is dropped, seconds between keepalive comments
+PRODUCT_EVENTS = {
+    "PATH": "/api/product/events/",
+    "QUEUE_SIZE": 64,
+    "HEARTBEAT": 15,
+}
+
+# Seconds deleted product tombstones are kept for delta sync clients
+PRODUCT_TOMBSTONE_RETENTION = 7 * 24 * 60 * 60
+
+# Seconds of changes a caught up sync token reports again, covering writes
+# that commit after later stamped ones
+PRODUCT_CHANGES_LAG = 10
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -129,11 +193,76 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.BasicAuthentication",
+        "common.authentication.CachedBasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "EXCEPTION_HANDLER": "common.exception_handlers.custom_exception_handler",
 }
 
+# Keyset pagination defaults, clients may ask for up to MAX_PAGE_SIZE rows
+KEYSET_PAGINATION = {
+    "PAGE_SIZE": 50,
+    "MAX_PAGE_SIZE": 500,
+}
+
 # User model
 AUTH_USER_MODEL = "users.User"
+
+# Session users are resolved through the in-process user cache
+AUTHENTICATION_BACKENDS = ["common.authentication.CachedModelBackend"]
+
+# Sessions, "apps.users.sessions" keeps them in signed cookies
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", "django.contrib.sessions.backends.db")
+
+# Seconds between refreshes of the revoked signed session snapshot
+STATELESS_SESSIONS = {
+    "REFRESH": 5,
+}
+
+# User rows cached per process for session authentication (TTL in seconds)
+USER_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 30,
+}
+
+# Seconds a stored Idempotency-Key response is replayed for
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Seconds a request holds its Idempotency-Key before a retry may take it over
+IDEMPOTENCY_KEY_LOCK_TTL = 60
+
+# Request latency histogram buckets (seconds) served on /metrics/, which is
+# readable by staff users and by scrapers sending the bearer TOKEN
+METRICS = {
+    "BUCKETS": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    "TOKEN": os.environ.get("METRICS_TOKEN"),
+}
+
+# Login attempts allowed per (attempts, seconds) sliding window, counted per
+# username and per client IP; set CACHE_ALIAS to share counters across processes.
+# Client IPs come from REMOTE_ADDR unless REST_FRAMEWORK["NUM_PROXIES"] is set
+LOGIN_THROTTLE = {
+    "USERNAME_RATE": (5, 60),
+    "IP_RATE": (100, 60),
+    "MAX_KEYS": 100000,
+    "CACHE_ALIAS": None,
+}
+
+# Bulk user provisioning: largest accepted batch and rows per INSERT
+USER_BULK = {
+    "MAX_ITEMS": 10000,
+    "CHUNK_SIZE": 1000,
+}
+
+# Worker processes hashing passwords for the async login and register views
+# (None for one per CPU) and hashes allowed in flight before answering 503
+PASSWORD_HASHING = {
+    "WORKERS": None,
+    "MAX_PENDING": 256,
+}
+
+# Verified Basic credentials kept in process memory (TTL in seconds)
+BASIC_AUTH_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 300,
+}
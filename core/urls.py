@@ -16,8 +16,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from common.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/user/", include("apps.users.urls")),
     path("api/product/", include("apps.products.urls")),
+    path("metrics/", metrics_view, name="metrics"),
 ]